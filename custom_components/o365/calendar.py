@@ -21,9 +21,11 @@ from homeassistant.components.calendar import (
     is_offset_reached,
 )
 from homeassistant.const import CONF_NAME
+from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
 from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity import generate_entity_id
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.util import dt as dt_util
 from requests.exceptions import HTTPError, RetryError
 
@@ -44,6 +46,7 @@ from .const import (
     CONF_CAL_ID,
     CONF_CAL_IDS,
     CONF_CONFIG_TYPE,
+    CONF_DELTA_SYNC,
     CONF_DEVICE_ID,
     CONF_ENABLE_UPDATE,
     CONF_ENTITIES,
@@ -53,7 +56,9 @@ from .const import (
     CONF_IS_AUTHENTICATED,
     CONF_MAX_RESULTS,
     CONF_PERMISSIONS,
+    CONF_PUSH_MANAGER,
     CONF_SEARCH,
+    CONF_THROTTLE,
     CONF_TRACK,
     CONF_TRACK_NEW_CALENDAR,
     CONST_CONFIG_TYPE_LIST,
@@ -67,11 +72,18 @@ from .const import (
     EVENT_REMOVE_CALENDAR_EVENT,
     EVENT_REMOVE_CALENDAR_RECURRENCES,
     EVENT_RESPOND_CALENDAR_EVENT,
+    JSON_CALENDAR_DELTA_FILENAME,
     LEGACY_ACCOUNT_NAME,
     PERM_CALENDARS_READWRITE,
+    PUSH_SAFETY_POLL,
+    RATE_LIMIT_INTERACTIVE,
+    THROTTLE_OUTLOOK,
     YAML_CALENDARS_FILENAME,
     EventResponse,
 )
+from .helpers.delta import O365CalendarDelta, O365DeltaStore
+from .helpers.push import build_push_resource
+from .helpers.throttle import O365ThrottledError
 from .schema import (
     CALENDAR_SERVICE_CREATE_SCHEMA,
     CALENDAR_SERVICE_MODIFY_SCHEMA,
@@ -136,6 +148,7 @@ async def _async_setup_add_entities(
         load_yaml_file, yaml_filepath, CONF_CAL_ID, YAML_CALENDAR_DEVICE_SCHEMA
     )
     cal_ids = {}
+    delta_store = O365DeltaStore(hass, conf, JSON_CALENDAR_DELTA_FILENAME)
 
     for cal_id, calendar in calendars.items():
         for entity in calendar.get(CONF_ENTITIES):
@@ -153,6 +166,7 @@ async def _async_setup_add_entities(
                     device_id,
                     conf,
                     update_supported,
+                    delta_store,
                 )
                 await cal.data.async_calendar_data_init(hass)
             except HTTPError:
@@ -232,6 +246,7 @@ class O365CalendarEntity(CalendarEntity):
         device_id,
         config,
         update_supported,
+        delta_store=None,
     ):
         """Initialise the O365 Calendar Event."""
         self._config = config
@@ -242,8 +257,10 @@ class O365CalendarEntity(CalendarEntity):
         self._name = f"{entity.get(CONF_NAME)}"
         self.entity_id = entity_id
         self._offset_reached = False
+        self._offset_time = None
         self._data_attribute = []
-        self.data = self._init_data(calendar_id, entity)
+        self._push_poll_unsub = None
+        self.data = self._init_data(calendar_id, entity, delta_store)
         self._calendar_id = calendar_id
         self._device_id = device_id
         if update_supported:
@@ -254,17 +271,20 @@ class O365CalendarEntity(CalendarEntity):
             )
         self._error = None
 
-    def _init_data(self, calendar_id, entity):
+    def _init_data(self, calendar_id, entity, delta_store):
         max_results = entity.get(CONF_MAX_RESULTS)
         search = entity.get(CONF_SEARCH)
         exclude = entity.get(CONF_EXCLUDE)
         return O365CalendarData(
             self._account,
+            self._config[CONF_THROTTLE],
             self.entity_id,
             calendar_id,
             search,
             exclude,
             max_results,
+            delta_store if entity.get(CONF_DELTA_SYNC) else None,
+            (self._start_offset, self._end_offset),
         )
 
     @property
@@ -301,17 +321,87 @@ class O365CalendarEntity(CalendarEntity):
             f"{self._calendar_id}_{self._config[CONF_ACCOUNT_NAME]}_{self._device_id}"
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to calendar changes when push notifications are enabled."""
+        if (push_manager := self._config.get(CONF_PUSH_MANAGER)) and (
+            resource := self.data.push_resource()
+        ):
+            push_manager.async_register(
+                resource,
+                "created,updated,deleted",
+                self._async_push_notify,
+                self._async_push_status,
+            )
+
+    @callback
+    def _async_push_notify(self):
+        self.async_schedule_update_ha_state(True)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel the next pushed update poll."""
+        self._async_cancel_push_poll()
+
+    @callback
+    def _async_push_status(self, active):
+        # The platform checks should_poll on each interval, so this is honoured
+        self._attr_should_poll = not active
+        self._async_schedule_push_poll()
+
+    @callback
+    def _async_schedule_push_poll(self):
+        """Poll a pushed calendar when the event shown moves on, else now and then.
+
+        Notifications only come for changes, so the event shown, its offset and
+        the data window, which move on with time, still need updating, as does
+        the delta window each day. A slow poll also covers lost notifications.
+        """
+        self._async_cancel_push_poll()
+        if self._attr_should_poll:
+            return
+        now = dt_util.utcnow()
+        times = [
+            now + timedelta(seconds=PUSH_SAFETY_POLL),
+            dt_util.as_utc(dt_util.start_of_local_day() + timedelta(days=1)),
+        ]
+        if self._event:
+            times.extend(
+                dt_util.as_utc(O365CalendarData.to_datetime(value))
+                for value in (self._event.start, self._event.end)
+            )
+        if self._offset_time:
+            times.append(dt_util.as_utc(self._offset_time))
+        self._push_poll_unsub = async_track_point_in_utc_time(
+            self.hass,
+            self._async_push_poll,
+            min((time for time in times if time > now), default=times[0]),
+        )
+
+    @callback
+    def _async_cancel_push_poll(self):
+        if self._push_poll_unsub:
+            self._push_poll_unsub()
+            self._push_poll_unsub = None
+
+    @callback
+    def _async_push_poll(self, _now):
+        self._push_poll_unsub = None
+        self.async_schedule_update_ha_state(True)
+
     async def async_get_events(self, hass, start_date, end_date):
         """Get events."""
         return await self.data.async_get_events(hass, start_date, end_date)
 
     async def async_update(self):
         """Do the update."""
+        await self._async_update()
+        self._async_schedule_push_poll()
+
+    async def _async_update(self):
         # Get today's event for HA Core.
         try:
             await self.data.async_update(self.hass)
             event = deepcopy(self.data.event)
-        except (HTTPError, RetryError, ConnectionError) as err:
+        except (HTTPError, RetryError, O365ThrottledError, ConnectionError) as err:
             self._log_error("Error getting calendar events for day", err)
             return
 
@@ -319,6 +409,9 @@ class O365CalendarEntity(CalendarEntity):
             event.summary, offset = extract_offset(event.summary, DEFAULT_OFFSET)
             start = O365CalendarData.to_datetime(event.start)
             self._offset_reached = is_offset_reached(start, offset)
+            self._offset_time = start + offset
+        else:
+            self._offset_time = None
 
         # Get events for extra attributes.
         try:
@@ -327,7 +420,7 @@ class O365CalendarEntity(CalendarEntity):
                 dt_util.utcnow() + timedelta(hours=self._start_offset),
                 dt_util.utcnow() + timedelta(hours=self._end_offset),
             )
-        except (HTTPError, RetryError, ConnectionError) as err:
+        except (HTTPError, RetryError, O365ThrottledError, ConnectionError) as err:
             self._log_error("Error getting calendar events for data", err)
             return
         self._error = False
@@ -398,7 +491,7 @@ class O365CalendarEntity(CalendarEntity):
 
         event = calendar.new_event()
         event = add_call_data_to_event(event, subject, start, end, **kwargs)
-        await self.hass.async_add_executor_job(event.save)
+        await self._async_call(event.save)
         self._raise_event(EVENT_CREATE_CALENDAR_EVENT, event.object_id)
         self.async_schedule_update_ha_state(True)
 
@@ -440,7 +533,7 @@ class O365CalendarEntity(CalendarEntity):
     ):
         event = await self._async_get_event_from_calendar(event_id)
         event = add_call_data_to_event(event, subject, start, end, **kwargs)
-        await self.hass.async_add_executor_job(event.save)
+        await self._async_call(event.save)
         self._raise_event(ha_event, event_id)
         self.async_schedule_update_ha_state(True)
 
@@ -476,9 +569,7 @@ class O365CalendarEntity(CalendarEntity):
 
     async def _async_delete_calendar_event(self, event_id, ha_event):
         event = await self._async_get_event_from_calendar(event_id)
-        await self.hass.async_add_executor_job(
-            event.delete,
-        )
+        await self._async_call(event.delete)
         self._raise_event(ha_event, event_id)
         self.async_schedule_update_ha_state(True)
 
@@ -500,12 +591,12 @@ class O365CalendarEntity(CalendarEntity):
     async def _async_send_response(self, event_id, response, send_response, message):
         event = await self._async_get_event_from_calendar(event_id)
         if response == EventResponse.Accept:
-            await self.hass.async_add_executor_job(
+            await self._async_call(
                 ft.partial(event.accept_event, message, send_response=send_response)
             )
 
         elif response == EventResponse.Tentative:
-            await self.hass.async_add_executor_job(
+            await self._async_call(
                 ft.partial(
                     event.accept_event,
                     message,
@@ -515,13 +606,18 @@ class O365CalendarEntity(CalendarEntity):
             )
 
         elif response == EventResponse.Decline:
-            await self.hass.async_add_executor_job(
+            await self._async_call(
                 ft.partial(event.decline_event, message, send_response=send_response)
             )
 
     async def _async_get_event_from_calendar(self, event_id):
         calendar = self.data.calendar
-        return await self.hass.async_add_executor_job(calendar.get_event, event_id)
+        return await self._async_call(calendar.get_event, event_id)
+
+    async def _async_call(self, func, *args):
+        return await self._config[CONF_THROTTLE].async_call(
+            THROTTLE_OUTLOOK, func, *args, priority=RATE_LIMIT_INTERACTIVE
+        )
 
     def _validate_permissions(self, error_message):
         if not self._config[CONF_PERMISSIONS].validate_authorization(
@@ -552,14 +648,18 @@ class O365CalendarData:
     def __init__(
         self,
         account,
+        throttle,
         entity_id,
         calendar_id,
         search=None,
         exclude=None,
         limit=999,
+        delta_store=None,
+        delta_offsets=(0, 24),
     ):
         """Initialise the O365 Calendar Data."""
         self._account = account
+        self._throttle = throttle
         self._limit = limit
         self.group_calendar = calendar_id.startswith(CONST_GROUP)
         self.calendar_id = calendar_id
@@ -571,6 +671,10 @@ class O365CalendarData:
         self._entity_id = entity_id
         self._error = False
         self._builder = QueryBuilder(protocol=account.protocol)
+        # Group calendars are read via the group's schedule, which has no delta
+        self._delta_store = None if self.group_calendar else delta_store
+        self._delta_offsets = delta_offsets
+        self._delta = None
 
     async def async_calendar_data_init(self, hass):
         """Async init of calendar data."""
@@ -583,17 +687,26 @@ class O365CalendarData:
             self._schedule = await hass.async_add_executor_job(self._account.schedule)
             self.calendar = None
 
+    def push_resource(self):
+        """Resource for change notifications, group calendars are polled."""
+        if self.group_calendar or not self._schedule:
+            return None
+        return build_push_resource(
+            self._schedule, f"/calendars/{self.calendar_id}/events"
+        )
+
     async def _async_get_calendar(self, hass):
         try:
             schedule = await hass.async_add_executor_job(self._account.schedule)
             query = self._builder.select("name", "id", "canEdit", "color", "hexColor")
-            self.calendar = await hass.async_add_executor_job(
+            self.calendar = await self._throttle.async_call(
+                THROTTLE_OUTLOOK,
                 ft.partial(
                     schedule.get_calendar, calendar_id=self.calendar_id, query=query
-                )
+                ),
             )
             return True
-        except (HTTPError, RetryError, ConnectionError) as err:
+        except (HTTPError, RetryError, O365ThrottledError, ConnectionError) as err:
             _LOGGER.warning("Error getting calendar events - %s", err)
             return False
 
@@ -603,9 +716,12 @@ class O365CalendarData:
             if not await self._async_get_calendar(hass):
                 return []
 
-        events = await self._async_calendar_schedule_get_events(
-            hass, self.calendar, start_date, end_date
-        )
+        if self._delta_store:
+            events = await self._async_delta_get_events(hass, start_date, end_date)
+        else:
+            events = await self._async_calendar_schedule_get_events(
+                hass, self.calendar, start_date, end_date
+            )
         if events is None:
             return None
 
@@ -666,7 +782,8 @@ class O365CalendarData:
         # if self._exclude is not None:
         #     query.chain("and").on_attribute("subject").negate().contains(self._exclude)
         try:
-            return await hass.async_add_executor_job(
+            return await self._throttle.async_call(
+                THROTTLE_OUTLOOK,
                 ft.partial(
                     calendar_schedule.get_events,
                     limit=self._limit,
@@ -674,12 +791,55 @@ class O365CalendarData:
                     include_recurring=True,
                     start_recurring=self._builder.greater_equal("start", start_date),
                     end_recurring=self._builder.less_equal("end", end_date),
-                )
+                ),
             )
-        except (HTTPError, RetryError, ConnectionError) as err:
+        except (HTTPError, RetryError, O365ThrottledError, ConnectionError) as err:
             _LOGGER.warning("Error getting calendar events - %s", err)
             return None
 
+    async def _async_get_delta(self):
+        """Get the delta tracker for today's window, starting afresh each day."""
+        start_offset, end_offset = self._delta_offsets
+        start_of_day_utc = dt_util.as_utc(dt_util.start_of_local_day())
+        start = start_of_day_utc + timedelta(hours=min(start_offset, 0))
+        end = start_of_day_utc + timedelta(days=1, hours=max(end_offset, 0))
+        if not self._delta or self._delta.start != start or self._delta.end != end:
+            self._delta = O365CalendarDelta(
+                self.calendar,
+                start,
+                end,
+                await self._delta_store.async_get(self._entity_id),
+            )
+        return self._delta
+
+    async def _async_delta_sync(self, hass):
+        delta = await self._async_get_delta()
+        try:
+            await self._throttle.async_call(THROTTLE_OUTLOOK, delta.sync_events)
+        except (HTTPError, RetryError, O365ThrottledError, ConnectionError) as err:
+            _LOGGER.warning("Error getting calendar events - %s", err)
+            return False
+        await self._delta_store.async_save({self._entity_id: delta})
+        return True
+
+    async def _async_delta_get_events(self, hass, start_date, end_date):
+        """Serve the events from the delta window if it holds the period."""
+        delta = await self._async_get_delta()
+        if not delta.covers(start_date, end_date):
+            return await self._async_calendar_schedule_get_events(
+                hass, self.calendar, start_date, end_date
+            )
+        if not delta.synced and not await self._async_delta_sync(hass):
+            return None
+
+        events = delta.get_events(start_date, end_date)
+        if self._search is not None:
+            search = self._search.lower()
+            events = [event for event in events if search in event.subject.lower()]
+        if self._limit:
+            events = self._sort_events(events)[: self._limit]
+        return events
+
     async def async_get_events(self, hass, start_date, end_date):
         """Get the via async."""
         results = await self.async_o365_get_events(hass, start_date, end_date)
@@ -709,6 +869,8 @@ class O365CalendarData:
 
     async def async_update(self, hass):
         """Do the update."""
+        if self._delta_store and self.calendar:
+            await self._async_delta_sync(hass)
         start_of_day_utc = dt_util.as_utc(dt_util.start_of_local_day())
         results = await self.async_o365_get_events(
             hass,
@@ -837,8 +999,10 @@ class CalendarServices:
                 )
                 builder = QueryBuilder(protocol=self._account.protocol)
                 query = builder.select("name", "id", "canEdit", "color", "hexColor")
-                calendars = await self._hass.async_add_executor_job(
-                    ft.partial(schedule.list_calendars, query=query, limit=50)
+                calendars = await config[CONF_THROTTLE].async_call(
+                    THROTTLE_OUTLOOK,
+                    ft.partial(schedule.list_calendars, query=query, limit=50),
+                    priority=RATE_LIMIT_INTERACTIVE,
                 )
                 track = config.get(CONF_TRACK_NEW_CALENDAR, True)
                 for calendar in calendars:
@@ -0,0 +1,61 @@
+"""O365 API sensor."""
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.const import EntityCategory
+
+from ..const import (
+    ATTR_BACKGROUND_QUEUE,
+    ATTR_CHAT_MEMBER_CACHE,
+    ATTR_INTERACTIVE_QUEUE,
+    ATTR_OUTBOX_LATENCY,
+    ATTR_OUTBOX_QUEUE,
+    ATTR_THROTTLED,
+    ATTR_WAIT_TIME,
+    CONF_CHAT_MEMBER_CACHE,
+    CONF_OUTBOX,
+    CONF_RATE_LIMITER,
+    CONF_THROTTLE,
+    RATE_LIMIT_BACKGROUND,
+    RATE_LIMIT_INTERACTIVE,
+    SENSOR_API,
+)
+
+
+class O365ApiSensor(SensorEntity):
+    """O365 API sensor, showing the account's MS Graph call queue."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_translation_key = SENSOR_API
+
+    def __init__(self, config, name, entity_id, unique_id):
+        """Initialise the API Sensor."""
+        self._rate_limiter = config[CONF_RATE_LIMITER]
+        self._throttle = config[CONF_THROTTLE]
+        self._chat_member_cache = config[CONF_CHAT_MEMBER_CACHE]
+        self._outbox = config.get(CONF_OUTBOX)
+        self._attr_name = name
+        self.entity_id = entity_id
+        self._attr_unique_id = unique_id
+
+    @property
+    def native_value(self):
+        """Calls waiting for the rate limiter."""
+        return self._rate_limiter.queue_depth
+
+    @property
+    def extra_state_attributes(self):
+        """Queue, wait time, throttling, cache and outbox details."""
+        lane_depths = self._rate_limiter.lane_depths
+        attributes = {
+            ATTR_INTERACTIVE_QUEUE: lane_depths[RATE_LIMIT_INTERACTIVE],
+            ATTR_BACKGROUND_QUEUE: lane_depths[RATE_LIMIT_BACKGROUND],
+            ATTR_WAIT_TIME: round(self._rate_limiter.wait_time, 2),
+            ATTR_THROTTLED: self._throttle.state,
+            ATTR_CHAT_MEMBER_CACHE: self._chat_member_cache.stats,
+        }
+        if self._outbox:
+            attributes[ATTR_OUTBOX_QUEUE] = self._outbox.queue_depth
+            attributes[ATTR_OUTBOX_LATENCY] = round(self._outbox.latency, 2)
+        return attributes
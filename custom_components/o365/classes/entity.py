@@ -3,7 +3,15 @@
 from homeassistant.exceptions import ServiceValidationError
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from ..const import ATTR_DATA, CONF_PERMISSIONS, DOMAIN
+from ..const import (
+    ATTR_DATA,
+    ATTR_THROTTLED_UNTIL,
+    CONF_PERMISSIONS,
+    CONF_THROTTLE,
+    DOMAIN,
+    RATE_LIMIT_INTERACTIVE,
+    THROTTLE_RESOURCES,
+)
 
 
 class O365Entity(CoordinatorEntity):
@@ -36,6 +44,28 @@ class O365Entity(CoordinatorEntity):
         """Entity unique id."""
         return self._unique_id
 
+    @property
+    def extra_state_attributes(self):
+        """Device state attributes."""
+        return self._throttle_attributes or None
+
+    @property
+    def _throttle_attributes(self):
+        """Diagnostic attribute, when MS Graph is throttling the entity's resource."""
+        resource = THROTTLE_RESOURCES[self.entity_type]
+        if until := self._config[CONF_THROTTLE].throttled_until(resource):
+            return {ATTR_THROTTLED_UNTIL: until.isoformat()}
+        return {}
+
+    async def _async_call(self, func, *args):
+        """Make an API call for a service, ahead of any queued polling."""
+        return await self._config[CONF_THROTTLE].async_call(
+            THROTTLE_RESOURCES[self.entity_type],
+            func,
+            *args,
+            priority=RATE_LIMIT_INTERACTIVE,
+        )
+
     def _validate_permissions(self, required_permission, required_permission_error):
         if not self._config[CONF_PERMISSIONS].validate_authorization(
             required_permission
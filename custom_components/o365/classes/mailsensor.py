@@ -1,10 +1,12 @@
 """O365 mail sensors."""
 
 import datetime
+import functools as ft
+import os
 from operator import itemgetter
 
 from homeassistant.components.sensor import SensorEntity
-
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
 from O365 import mailbox  # pylint: disable=no-name-in-module
 from O365.utils.query import (  # pylint: disable=no-name-in-module, import-error
     QueryBuilder,
@@ -19,22 +21,33 @@ from ..const import (
     ATTR_INTERNALREPLY,
     ATTR_START,
     ATTR_STATE,
+    BODY_MODE_HTML,
+    BODY_MODE_NONE,
+    BODY_MODE_PREVIEW,
+    BODY_MODE_TEXT,
     CONF_ACCOUNT,
+    CONF_ATTACHMENT_STORE,
     CONF_BODY_CONTAINS,
+    CONF_BODY_MODE,
+    CONF_DOWNLOAD_ATTACHMENT_CONTENT,
     CONF_DOWNLOAD_ATTACHMENTS,
     CONF_HAS_ATTACHMENT,
     CONF_HTML_BODY,
     CONF_IMPORTANCE,
     CONF_IS_UNREAD,
     CONF_MAIL_FROM,
+    CONF_MAILBOX_REGISTRY,
     CONF_SHOW_BODY,
     CONF_SUBJECT_CONTAINS,
     CONF_SUBJECT_IS,
     DATETIME_FORMAT,
+    DOMAIN,
+    GRAPH_PREFER_TEXT_BODY,
     PERM_MAILBOX_SETTINGS,
     SENSOR_AUTO_REPLY,
     SENSOR_EMAIL,
 )
+from ..helpers.attachments import get_attachment_content
 from ..utils.utils import clean_html, get_email_attributes
 from .entity import O365Entity
 
@@ -48,10 +61,11 @@ class O365MailSensor(O365Entity, SensorEntity):
         """Initialise the O365 Sensor."""
         super().__init__(coordinator, config, name, entity_id, SENSOR_EMAIL, unique_id)
         self._download_attachments = sensor_conf.get(CONF_DOWNLOAD_ATTACHMENTS)
-        self._html_body = sensor_conf.get(CONF_HTML_BODY)
-        self._show_body = sensor_conf.get(CONF_SHOW_BODY)
+        self._body_mode = body_mode(sensor_conf)
         self._state = None
         self._extra_attributes = None
+        # (id, last modified) to rendered attributes, for the emails last shown
+        self._attribute_memo = {}
         self._update_status()
 
     @property
@@ -62,7 +76,7 @@ class O365MailSensor(O365Entity, SensorEntity):
     @property
     def extra_state_attributes(self):
         """Device state attributes."""
-        return self._extra_attributes
+        return self._extra_attributes | self._throttle_attributes
 
     def _handle_coordinator_update(self) -> None:
         self._update_status()
@@ -76,12 +90,61 @@ class O365MailSensor(O365Entity, SensorEntity):
         self._extra_attributes = {ATTR_DATA: attrs}
 
     def _get_attributes(self, data):
-        return [
-            get_email_attributes(
-                x, self._download_attachments, self._html_body, self._show_body
+        # Rendering the body is costly, so only emails changed since the last
+        # update are rendered again
+        memo = {}
+        attrs = []
+        for mail in data:
+            memo_key = (mail.object_id, mail.modified)
+            attributes = self._attribute_memo.get(memo_key) if mail.modified else None
+            if attributes is None:
+                attributes = get_email_attributes(
+                    mail, self._download_attachments, self._body_mode
+                )
+            memo[memo_key] = attributes
+            attrs.append(attributes)
+        self._attribute_memo = memo
+        return attrs
+
+    async def async_get_attachment(self, uid, attachment_name):
+        """Get the local path of an attachment to one of the sensor's emails."""
+        mail = next(
+            (
+                mail
+                for mail in self.coordinator.data[self.entity_key][ATTR_DATA]
+                if mail.object_id == uid
+            ),
+            None,
+        )
+        attachment = mail and next(
+            (x for x in mail.attachments if x.name == attachment_name), None
+        )
+        if not attachment:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="attachment_not_found",
+                translation_placeholders={
+                    "attachment_name": attachment_name,
+                    "uid": uid,
+                },
+            )
+
+        path = await self._config[CONF_ATTACHMENT_STORE].async_get_path(
+            attachment.attachment_id,
+            attachment.name,
+            ft.partial(self._async_call, get_attachment_content, mail, attachment),
+        )
+        if not path:
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="attachment_not_downloaded",
+                translation_placeholders={"attachment_name": attachment_name},
             )
-            for x in data
-        ]
+        size = attachment.size
+        if size is None:
+            # Emails read without the attachments expand carry no size
+            size = await self.hass.async_add_executor_job(os.path.getsize, path)
+        return {"path": path, "name": attachment.name, "size": size}
 
 
 class O365AutoReplySensor(O365Entity, SensorEntity):
@@ -100,7 +163,7 @@ class O365AutoReplySensor(O365Entity, SensorEntity):
 
     async def async_init(self, hass):
         """async initialise."""
-        self.mailbox = await hass.async_add_executor_job(self._account.mailbox)
+        self.mailbox = await self._config[CONF_MAILBOX_REGISTRY].async_get_mailbox()
 
     @property
     def native_value(self):
@@ -111,13 +174,15 @@ class O365AutoReplySensor(O365Entity, SensorEntity):
     def extra_state_attributes(self):
         """Return entity specific state attributes."""
         ars = self.coordinator.data[self.entity_key][ATTR_AUTOREPLIESSETTINGS]
+        if ars is None:
+            return self._throttle_attributes
         return {
             ATTR_INTERNALREPLY: clean_html(ars.internal_reply_message),
             ATTR_EXTERNALREPLY: clean_html(ars.external_reply_message),
             ATTR_EXTERNAL_AUDIENCE: ars.external_audience.value,
             ATTR_START: ars.scheduled_startdatetime.strftime(DATETIME_FORMAT),
             ATTR_END: ars.scheduled_enddatetime.strftime(DATETIME_FORMAT),
-        }
+        } | self._throttle_attributes
 
     async def async_auto_reply_enable(
         self,
@@ -131,7 +196,7 @@ class O365AutoReplySensor(O365Entity, SensorEntity):
         if not self._validate_autoreply_permissions():
             return
 
-        await self.hass.async_add_executor_job(
+        await self._async_call(
             self.mailbox.set_automatic_reply,
             internal_reply,
             external_reply,
@@ -145,7 +210,7 @@ class O365AutoReplySensor(O365Entity, SensorEntity):
         if not self._validate_autoreply_permissions():
             return
 
-        await self.hass.async_add_executor_job(self.mailbox.set_disable_reply)
+        await self._async_call(self.mailbox.set_disable_reply)
 
     def _validate_autoreply_permissions(self):
         return self._validate_permissions(
@@ -155,12 +220,65 @@ class O365AutoReplySensor(O365Entity, SensorEntity):
         )
 
 
+def body_mode(sensor_conf):
+    """Body shown by the sensor, falling back to the html_body and show_body options."""
+    if mode := sensor_conf.get(CONF_BODY_MODE):
+        return mode
+    if sensor_conf.get(CONF_HTML_BODY):
+        return BODY_MODE_HTML
+    if sensor_conf.get(CONF_SHOW_BODY):
+        return BODY_MODE_TEXT
+    return BODY_MODE_NONE
+
+
+def request_headers(sensor_conf):
+    """Headers for the sensor's email requests.
+
+    For plain text bodies MS Graph converts the body, so no HTML is fetched
+    or parsed.
+    """
+    if body_mode(sensor_conf) == BODY_MODE_TEXT:
+        return {"Prefer": GRAPH_PREFER_TEXT_BODY}
+    return {}
+
+
+def download_attachment_content(sensor_conf):
+    """Check whether the attachments' content is downloaded with each email."""
+    return bool(
+        sensor_conf.get(CONF_DOWNLOAD_ATTACHMENTS)
+        and sensor_conf.get(CONF_DOWNLOAD_ATTACHMENT_CONTENT)
+    )
+
+
 async def _async_build_base_query(sensor_conf, builder):
     """Build base query for mail."""
-    download_attachments = sensor_conf.get(CONF_DOWNLOAD_ATTACHMENTS)
-    show_body = sensor_conf.get(CONF_SHOW_BODY)
-    html_body = sensor_conf.get(CONF_HTML_BODY)
-    query = builder.select(
+    query = builder.select(*_select_fields(sensor_conf))
+    if _expand_attachments(sensor_conf):
+        query = query & _build_attachments_expand(builder)
+    return query
+
+
+def _expand_attachments(sensor_conf):
+    """Check whether the attachment names are fetched with each email.
+
+    When the content is downloaded, the names come with it.
+    """
+    return bool(
+        sensor_conf.get(CONF_DOWNLOAD_ATTACHMENTS)
+        and not download_attachment_content(sensor_conf)
+    )
+
+
+def _build_attachments_expand(builder):
+    """Expand the attachments without their content."""
+    # The library's attachment objects keep the size but not the content type
+    return builder.expand("attachments", select=builder.select("name", "size"))
+
+
+def _select_fields(sensor_conf):
+    """Fields the sensor needs for each email."""
+    mode = body_mode(sensor_conf)
+    fields = [
         "sender",
         "from",
         "subject",
@@ -171,16 +289,18 @@ async def _async_build_base_query(sensor_conf, builder):
         "importance",
         "is_read",
         "flag",
-    )
-    if show_body or html_body:
-        query = query & builder.select(
-            "body",
-        )
-    if download_attachments:
-        query = query & builder.select(
-            "attachments",
-        )
-    return query
+        "lastModifiedDateTime",
+    ]
+    if mode == BODY_MODE_PREVIEW:
+        fields.append("bodyPreview")
+    elif mode != BODY_MODE_NONE:
+        fields.append("body")
+    return fields
+
+
+async def async_build_select_query(sensor_conf, builder: QueryBuilder):
+    """Build query selecting the fields needed for a single message."""
+    return await _async_build_base_query(sensor_conf, builder)
 
 
 async def async_build_inbox_query(sensor_conf, builder: QueryBuilder):
@@ -232,6 +352,60 @@ async def async_build_query_query(sensor_conf, builder: QueryBuilder):
     return query
 
 
+async def async_build_shared_query(sensor_confs, builder: QueryBuilder):
+    """Build query fetching the newest emails with the fields all the sensors need."""
+    fields = dict.fromkeys(
+        field for sensor_conf in sensor_confs for field in _select_fields(sensor_conf)
+    )
+    query = builder.select(*fields) & builder.orderby(("receivedDateTime", False))
+    if any(_expand_attachments(sensor_conf) for sensor_conf in sensor_confs):
+        query = query & _build_attachments_expand(builder)
+    return query
+
+
+def can_filter_locally(sensor_conf):
+    """Check whether the sensor's filters give the same result applied locally.
+
+    Body and sender filters are left to the server, as the body may not be
+    fetched and the server matches the sender on more than the address.
+    Subject filters are too, as they match so few emails that the newest ones
+    rarely hold enough of them.
+    """
+    return (
+        sensor_conf.get(CONF_BODY_CONTAINS) is None
+        and sensor_conf.get(CONF_MAIL_FROM) is None
+        and sensor_conf.get(CONF_SUBJECT_CONTAINS) is None
+        and sensor_conf.get(CONF_SUBJECT_IS) is None
+    )
+
+
+def filter_messages(sensor_conf, messages):
+    """Apply the sensor's filters to fetched emails, newest first."""
+    subject_contains = sensor_conf.get(CONF_SUBJECT_CONTAINS)
+    subject_is = sensor_conf.get(CONF_SUBJECT_IS)
+    has_attachment = sensor_conf.get(CONF_HAS_ATTACHMENT)
+    importance = sensor_conf.get(CONF_IMPORTANCE)
+    is_unread = sensor_conf.get(CONF_IS_UNREAD)
+    return [
+        message
+        for message in messages
+        if (
+            subject_contains is None
+            or subject_contains.casefold() in (message.subject or "").casefold()
+        )
+        and (
+            subject_is is None
+            or subject_is.casefold() == (message.subject or "").casefold()
+        )
+        and (has_attachment is None or message.has_attachments == has_attachment)
+        and (
+            importance is None
+            or importance.casefold() == message.importance.value.casefold()
+        )
+        and (is_unread is None or message.is_read != is_unread)
+    ]
+
+
 def _add_to_query(
     query,
     builder: QueryBuilder,
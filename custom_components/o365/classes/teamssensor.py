@@ -88,7 +88,7 @@ class O365TeamsStatusSensor(O365TeamsSensor, SensorEntity):
         if not self._validate_status_permissions():
             return False
 
-        status = await self.hass.async_add_executor_job(
+        status = await self._async_call(
             self.teams.set_my_presence,
             self._application_id,
             availability,
@@ -122,7 +122,7 @@ class O365TeamsStatusSensor(O365TeamsSensor, SensorEntity):
             if availability != PreferredAvailability.OFFLINE
             else PreferredActivity.OFFWORK
         )
-        status = await self.hass.async_add_executor_job(
+        status = await self._async_call(
             self.teams.set_my_user_preferred_presence,
             availability,
             activity,
@@ -178,17 +178,17 @@ class O365TeamsChatSensor(O365TeamsSensor, SensorEntity):
             ]
         if self.coordinator.data[self.entity_key][ATTR_DATA]:
             attributes[ATTR_DATA] = self.coordinator.data[self.entity_key][ATTR_DATA]
-        return attributes
+        return attributes | self._throttle_attributes
 
     async def async_send_chat_message(self, chat_id, message, content_type):
         """Send a message to the specified chat."""
         if not self._validate_chat_permissions():
             return False
 
-        chats = await self.hass.async_add_executor_job(self.teams.get_my_chats)
+        chats = await self._async_call(self.teams.get_my_chats)
         for chat in chats:
             if chat.object_id == chat_id:
-                message = await self.hass.async_add_executor_job(
+                message = await self._async_call(
                     ft.partial(
                         chat.send_message, content=message, content_type=content_type
                     )
@@ -11,16 +11,22 @@ class EventResponse(Enum):
     Decline = "decline"  # pylint: disable=invalid-name
 
 
+ATTACHMENT_STORE_DIRECTORY = "{0}_attachments{1}"
+ATTACHMENT_STORE_INDEX = "index.json"
 ATTR_ACTIVITY = "activity"
 ATTR_ALL_DAY = "all_day"
 ATTR_ALL_TODOS = "all_todos"
 ATTR_ATTACHMENTS = "attachments"
+ATTR_ATTACHMENT_NAME = "attachment_name"
 ATTR_ATTENDEES = "attendees"
 ATTR_AUTOREPLIESSETTINGS = "autorepliessettings"
 ATTR_AVAILABILITY = "availability"
+ATTR_BACKGROUND_QUEUE = "background_queue"
 ATTR_BODY = "body"
 ATTR_CATEGORIES = "categories"
+ATTR_CHANGED = "changed"
 ATTR_CHAT_ID = "chat_id"
+ATTR_CHAT_MEMBER_CACHE = "chat_member_cache"
 ATTR_CHAT_TYPE = "chat_type"
 ATTR_COMPLETED = "completed"
 ATTR_CONTENT_TYPE = "content_type"
@@ -41,11 +47,14 @@ ATTR_FROM_DISPLAY_NAME = "from_display_name"
 ATTR_HEX_COLOR = "hex_color"
 ATTR_IS_ALL_DAY = "is_all_day"
 ATTR_IMPORTANCE = "importance"
+ATTR_INTERACTIVE_QUEUE = "interactive_queue"
 ATTR_INTERNALREPLY = "internal_reply"
 ATTR_LOCATION = "location"
 ATTR_MEMBERS = "members"
 ATTR_MESSAGE_IS_HTML = "message_is_html"
 ATTR_OFFSET = "offset_reached"
+ATTR_OUTBOX_LATENCY = "outbox_latency"
+ATTR_OUTBOX_QUEUE = "outbox_queue"
 ATTR_OVERDUE_TODOS = "overdue_todos"
 ATTR_PHOTOS = "photos"
 ATTR_REMINDER = "reminder"
@@ -60,11 +69,16 @@ ATTR_STATE = "state"
 ATTR_STATUS = "status"
 ATTR_SUBJECT = "subject"
 ATTR_SUMMARY = "summary"
+ATTR_THROTTLED = "throttled"
+ATTR_THROTTLED_UNTIL = "throttled_until"
 ATTR_TODOS = "todos"
 ATTR_TODO_ID = "todo_id"
 ATTR_TOPIC = "topic"
 ATTR_TYPE = "type"
+ATTR_UID = "uid"
+ATTR_WAIT_TIME = "wait_time"
 ATTR_ZIP_ATTACHMENTS = "zip_attachments"
+ATTR_ZIP_COMPRESSION_LEVEL = "zip_compression_level"
 ATTR_ZIP_NAME = "zip_name"
 AUTH_CALLBACK_NAME = "api:o365"
 AUTH_CALLBACK_PATH_ALT = "/api/o365"
@@ -72,25 +86,42 @@ AUTH_CALLBACK_PATH_DEFAULT = (
     "https://login.microsoftonline.com/common/oauth2/nativeclient"
 )
 
+# Characters of body text and HTML held
+BODY_CACHE_MAX_SIZE = 4 * 1024 * 1024
+BODY_MODE_HTML = "html"
+BODY_MODE_NONE = "none"
+BODY_MODE_PREVIEW = "preview"
+BODY_MODE_TEXT = "text"
+BODY_MODES = [BODY_MODE_NONE, BODY_MODE_PREVIEW, BODY_MODE_TEXT, BODY_MODE_HTML]
 CALENDAR_ENTITY_ID_FORMAT = "calendar.{}"
+CHAT_MEMBER_CACHE_SIZE = 100
+CHAT_MEMBER_CACHE_TTL = 3600
 CONF_ACCOUNT = "account"
 CONF_ACCOUNTS = "accounts"
 CONF_ACCOUNT_CONF = "account_conf"
 CONF_ACCOUNT_NAME = "account_name"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
 CONF_ALT_AUTH_METHOD = "alt_auth_method"
+CONF_ATTACHMENT_STORE = "attachment_store"
+CONF_ATTACHMENT_STORE_SIZE = "attachment_store_size"
 CONF_AUTH_URL = "auth_url"
 CONF_AUTO_REPLY_SENSORS = "auto_reply_sensors"
 CONF_BASIC_CALENDAR = "basic_calendar"
+CONF_BATCH_REQUESTS = "batch_requests"
 CONF_BODY_CONTAINS = "body_contains"
+CONF_BODY_MODE = "body_mode"
 CONF_CAL_ID = "cal_id"
 CONF_CAL_IDS = "cal_ids"
+CONF_CHAT_MEMBER_CACHE = "chat_member_cache"
 CONF_CHAT_SENSORS = "chat_sensors"
 CONF_CLIENT_ID = "client_id"
 CONF_CLIENT_SECRET = "client_secret"  # nosec
 CONF_CONFIG_TYPE = "config_type"
 CONF_COORDINATOR_EMAIL = "coordinator_email"
 CONF_COORDINATOR_SENSORS = "coordinator_sensors"
+CONF_DELTA_SYNC = "delta_sync"
 CONF_DEVICE_ID = "device_id"
+CONF_DOWNLOAD_ATTACHMENT_CONTENT = "download_attachment_content"
 CONF_DOWNLOAD_ATTACHMENTS = "download_attachments"
 CONF_DUE_HOURS_BACKWARD_TO_GET = "due_start_offset"
 CONF_DUE_HOURS_FORWARD_TO_GET = "due_end_offset"
@@ -116,12 +147,20 @@ CONF_KEYS_EMAIL = "keys_email"
 CONF_KEYS_SENSORS = "keys_sensors"
 CONF_MAIL_FOLDER = "folder"
 CONF_MAIL_FROM = "from"
+CONF_MAILBOX_REGISTRY = "mailbox_registry"
+CONF_MAX_CONCURRENT_UPDATES = "max_concurrent_updates"
 CONF_MAX_ITEMS = "max_items"
 CONF_MAX_RESULTS = "max_results"
+CONF_O365_DELTA = "o365_delta"
 CONF_O365_MAIL_FOLDER = "mail_folder"
+CONF_OUTBOX = "outbox"
 CONF_PERMISSIONS = "permissions"
+CONF_PUSH_MANAGER = "push_manager"
+CONF_PUSH_NOTIFICATIONS = "push_notifications"
 CONF_QUERY = "query"
 CONF_QUERY_SENSORS = "query_sensors"
+CONF_RATE_LIMIT = "rate_limit"
+CONF_RATE_LIMITER = "rate_limiter"
 CONF_SEARCH = "search"
 CONF_SENSOR_CONF = "sensor_conf"
 CONF_SHARED_MAILBOX = "shared_mailbox"
@@ -129,6 +168,7 @@ CONF_SHOW_COMPLETED = "show_completed"
 CONF_STATUS_SENSORS = "status_sensors"
 CONF_SUBJECT_CONTAINS = "subject_contains"
 CONF_SUBJECT_IS = "subject_is"
+CONF_THROTTLE = "throttle"
 CONF_O365_TASK_FOLDER = "O365_task_folder"
 CONF_TODO_SENSORS = "todo_sensors"
 CONF_TRACK = "track"
@@ -136,6 +176,7 @@ CONF_TRACK_NEW_CALENDAR = "track_new_calendar"
 CONF_TRACK_NEW = "track_new"
 CONF_YAML_TASK_LIST_ID = "task_list_id"
 CONF_YAML_TASK_LIST = "yaml_task_list"
+CONF_UPDATE_TIMEOUT = "update_timeout"
 CONF_URL = "url"
 CONST_CONFIG_TYPE_LIST = "list"
 CONST_GROUP = "group:"
@@ -145,7 +186,11 @@ CONST_UTC_TIMEZONE = "UTC"
 CONTENT_TYPES = ["text", "html"]
 
 DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+DEFAULT_ATTACHMENT_STORE_SIZE = 100
+DEFAULT_MAX_CONCURRENT_UPDATES = 4
 DEFAULT_OFFSET = "!!"
+DEFAULT_RATE_LIMIT = 4
+DEFAULT_UPDATE_TIMEOUT = 20
 DOMAIN = "o365"
 ENTITY_ID_FORMAT_SENSOR = "sensor.{}"
 ENTITY_ID_FORMAT_TODO = "todo.{}"
@@ -167,9 +212,39 @@ EVENT_SEND_CHAT_MESSAGE = "send_chat_message"
 EVENT_UPDATE_USER_STATUS = "update_user_status"
 EVENT_UPDATE_USER_PREFERRED_STATUS = "update_user_preferred_status"
 
+GRAPH_BATCH_ENDPOINT = "$batch"
+GRAPH_BATCH_MAX_REQUESTS = 20
+GRAPH_CHAT_MEMBERS = "members"
+GRAPH_CHAT_MEMBERSHIP_EVENTS = (
+    "#microsoft.graph.membersAddedEventMessageDetail",
+    "#microsoft.graph.membersDeletedEventMessageDetail",
+    "#microsoft.graph.membersJoinedEventMessageDetail",
+    "#microsoft.graph.membersLeftEventMessageDetail",
+)
+GRAPH_CHAT_PREVIEW = "lastMessagePreview"
+GRAPH_DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+GRAPH_DELTA_PAGE_SIZE = 100
+GRAPH_PREFER_TEXT_BODY = 'outlook.body-content-type="text"'
+GRAPH_PRESENCES_ENDPOINT = "/communications/getPresencesByUserId"
+GRAPH_PRESENCES_MAX_IDS = 650
+GRAPH_UPLOAD_CHUNK_SIZE = 10 * 320 * 1024
+GRAPH_UPLOAD_RETRIES = 5
+GRAPH_UPLOAD_SIZE_LIMIT_SIMPLE = 3 * 1024 * 1024
+
+JSON_CALENDAR_DELTA_FILENAME = "{0}_calendar_delta{1}.json"
+JSON_MAIL_DELTA_FILENAME = "{0}_mail_delta{1}.json"
+JSON_MAIL_FOLDERS_FILENAME = "{0}_mail_folders{1}.json"
+JSON_TODO_DELTA_FILENAME = "{0}_todo_delta{1}.json"
+
 LEGACY_ACCOUNT_NAME = "converted"
+MAIL_DELTA_EPOCH = "1900-01-01T00:00:00Z"
 O365_STORAGE = "o365_storage"
 O365_STORAGE_TOKEN = ".O365-token-cache"
+OUTBOX_BATCH_MESSAGE_SIZE = 100 * 1024
+OUTBOX_DIRECTORY = "{0}_outbox{1}"
+OUTBOX_LATENCY_SAMPLES = 50
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_MAX_CONCURRENT_SENDS = 4
 PERM_CALENDARS_READ = "Calendars.Read"
 PERM_CALENDARS_READBASIC = "Calendars.ReadBasic"
 PERM_CALENDARS_READWRITE = "Calendars.ReadWrite"
@@ -189,11 +264,36 @@ PERM_USER_READ = "User.Read"
 PERM_USER_READBASIC_ALL = "User.ReadBasic.All"
 PERM_SHARED = ".Shared"
 PERM_BASE_PERMISSIONS = [PERM_USER_READ]
+POLL_TICK = 30
+PUSH_CALLBACK_NAME = "api:o365:notify:{0}"
+PUSH_CALLBACK_PATH = "/api/o365/notify/{0}"
+PUSH_REFRESH_DELAY = 2
+PUSH_RENEW_INTERVAL = 20
+PUSH_SAFETY_POLL = 3600
+PUSH_SUBSCRIPTION_MINUTES = 55
+PUSH_VIEWS = "o365_push_views"
+RATE_LIMIT_BACKGROUND = "background"
+RATE_LIMIT_BURST = 10
+RATE_LIMIT_INTERACTIVE = "interactive"
+# Lanes in the order they are served
+RATE_LIMIT_LANES = (RATE_LIMIT_INTERACTIVE, RATE_LIMIT_BACKGROUND)
+RATE_LIMIT_WAIT_SAMPLES = 50
 
+SENSOR_API = "api"
 SENSOR_AUTO_REPLY = "auto_reply"
 SENSOR_EMAIL = "inbox"
 SENSOR_TEAMS_STATUS = "teams_status"
 SENSOR_TEAMS_CHAT = "teams_chat"
+SHARED_FETCH_FACTOR = 4
+THROTTLE_BACKOFF_BASE = 5
+THROTTLE_BACKOFF_MAX = 600
+THROTTLE_JITTER = 0.25
+THROTTLE_DIRECTORY = "directory"
+THROTTLE_OUTLOOK = "outlook"
+THROTTLE_PRESENCE = "presence"
+THROTTLE_SUBSCRIPTIONS = "subscriptions"
+THROTTLE_TEAMS = "teams"
+THROTTLE_TODO = "todo"
 TODO_TODO = "todo"
 TOKEN_FILENAME = "o365{0}.token"  # nosec
 TOKEN_FILE_CORRUPTED = "corrupted"
@@ -219,3 +319,20 @@ INDEXES = {
     "+4": "fourth",
     "-1": "last",
 }
+# Shortest and longest polling intervals in seconds by entity type, doubling
+# from the shortest each time a poll returns the same data
+POLL_INTERVALS = {
+    SENSOR_AUTO_REPLY: (300, 1800),
+    SENSOR_EMAIL: (30, 120),
+    SENSOR_TEAMS_CHAT: (30, 120),
+    SENSOR_TEAMS_STATUS: (30, 30),
+    TODO_TODO: (60, 600),
+}
+# MS Graph throttles by service, so entity types sharing a service back off together
+THROTTLE_RESOURCES = {
+    SENSOR_AUTO_REPLY: THROTTLE_OUTLOOK,
+    SENSOR_EMAIL: THROTTLE_OUTLOOK,
+    SENSOR_TEAMS_CHAT: THROTTLE_TEAMS,
+    SENSOR_TEAMS_STATUS: THROTTLE_PRESENCE,
+    TODO_TODO: THROTTLE_TODO,
+}
@@ -0,0 +1,141 @@
+"""Email attachment content store."""
+
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+import time
+
+from ..const import ATTACHMENT_STORE_DIRECTORY, ATTACHMENT_STORE_INDEX
+from ..utils.filemgmt import (
+    build_config_file_path,
+    build_yaml_filename,
+    load_json_file,
+    write_json_file,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_FILE = "file"
+ATTR_SIZE = "size"
+ATTR_USED = "used"
+
+
+class O365AttachmentStore:
+    """Attachment content for one account, saved in the o365_storage directory.
+
+    Files are named by the hash of their content, so an attachment sent in
+    several emails is held once. An attachment is only downloaded when it is
+    not already held, and the least recently used files are removed when the
+    store grows past its size cap.
+    """
+
+    def __init__(self, hass, config, max_size):
+        """Initialise the store, max_size is in MB."""
+        self._hass = hass
+        self._directory = build_config_file_path(
+            hass, build_yaml_filename(config, ATTACHMENT_STORE_DIRECTORY, True)
+        )
+        self._index_path = os.path.join(self._directory, ATTACHMENT_STORE_INDEX)
+        self._max_size = max_size * 1024 * 1024
+        # Attachment id to the file holding its content, its size and last use
+        self._index = None
+        self._lock = asyncio.Lock()
+
+    async def async_get_path(self, attachment_id, name, async_get_content):
+        """Get the local path of an attachment, getting its content if not held."""
+        async with self._lock:
+            if self._index is None:
+                self._index = await self._hass.async_add_executor_job(self._load)
+            if path := await self._hass.async_add_executor_job(
+                self._held_path, attachment_id
+            ):
+                return path
+            content = await async_get_content()
+            if content is None:
+                return None
+            return await self._hass.async_add_executor_job(
+                self._save, attachment_id, name, content
+            )
+
+    def _load(self):
+        os.makedirs(self._directory, exist_ok=True)
+        return load_json_file(self._index_path)
+
+    def _held_path(self, attachment_id):
+        if not (entry := self._index.get(attachment_id)):
+            return None
+        path = os.path.join(self._directory, entry[ATTR_FILE])
+        if not os.path.exists(path):
+            del self._index[attachment_id]
+            return None
+        entry[ATTR_USED] = time.time()
+        write_json_file(self._index_path, self._index)
+        return path
+
+    def _save(self, attachment_id, name, content):
+        # Keep the extension, so the file can be opened by type
+        extension = os.path.splitext(name or "")[1]
+        if not extension[1:].isalnum():
+            extension = ""
+        filename = f"{hashlib.sha256(content).hexdigest()}{extension.lower()}"
+        path = os.path.join(self._directory, filename)
+        if not os.path.exists(path):
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as out:
+                out.write(content)
+            os.replace(temp_path, path)
+
+        self._index[attachment_id] = {
+            ATTR_FILE: filename,
+            ATTR_SIZE: len(content),
+            ATTR_USED: time.time(),
+        }
+        self._evict(filename)
+        write_json_file(self._index_path, self._index)
+        return path
+
+    def _evict(self, keep):
+        """Remove the least recently used files until the store is under its cap."""
+        files = {}
+        for entry in self._index.values():
+            size, used = files.get(entry[ATTR_FILE], (entry[ATTR_SIZE], 0))
+            files[entry[ATTR_FILE]] = (size, max(used, entry[ATTR_USED]))
+
+        total = sum(size for size, _ in files.values())
+        for filename, (size, _) in sorted(files.items(), key=lambda item: item[1][1]):
+            if total <= self._max_size:
+                break
+            if filename == keep:
+                continue
+            _LOGGER.debug("Removing attachment file %s from store", filename)
+            try:
+                os.remove(os.path.join(self._directory, filename))
+            except FileNotFoundError:
+                pass
+            total -= size
+            self._index = {
+                attachment_id: entry
+                for attachment_id, entry in self._index.items()
+                if entry[ATTR_FILE] != filename
+            }
+
+
+def get_attachment_content(mail, attachment):
+    """Get an attachment's content, downloading it unless the email came with it.
+
+    Runs in the executor.
+    """
+    if attachment.content:
+        return base64.b64decode(attachment.content)
+    attachments = mail.attachments
+    url = attachments.build_url(
+        attachments._endpoints.get("get_mime").format(  # pylint: disable=protected-access
+            id=mail.object_id, ida=attachment.attachment_id
+        )
+    )
+    response = mail.con.get(url)
+    if not response:
+        return None
+    return response.content
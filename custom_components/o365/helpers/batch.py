@@ -0,0 +1,342 @@
+"""MS Graph JSON batching."""
+
+import asyncio
+import logging
+from urllib.parse import quote, urlencode
+
+from requests import Response
+from requests.exceptions import HTTPError, RequestException
+
+from ..const import (
+    GRAPH_BATCH_ENDPOINT,
+    GRAPH_BATCH_MAX_REQUESTS,
+    GRAPH_PRESENCES_ENDPOINT,
+    GRAPH_PRESENCES_MAX_IDS,
+    RATE_LIMIT_BACKGROUND,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+NEXT_LINK = "@odata.nextLink"
+
+
+class O365BatchRequest:
+    """Pack the requests for one poll, or one round of sends, into $batch payloads."""
+
+    def __init__(
+        self,
+        hass,
+        account,
+        semaphore,
+        rate_limiter,
+        timeout=None,
+        priority=RATE_LIMIT_BACKGROUND,
+    ):
+        """Initialise the batch."""
+        self._hass = hass
+        self._account = account
+        self._semaphore = semaphore
+        self._rate_limiter = rate_limiter
+        self._timeout = timeout
+        self._priority = priority
+        self._requests = {}
+        self._results = {}
+
+    def __contains__(self, request_id):
+        """Check whether a request is part of the batch."""
+        return request_id in self._requests
+
+    def __len__(self):
+        """Number of requests in the batch."""
+        return len(self._requests)
+
+    def add(self, request_id, url, params, parser, headers=None, body=None):
+        """Add a request and the parser which builds objects from its response body.
+
+        Requests with a body are sent as POST, others as GET.
+        """
+        self._requests[request_id] = (
+            self._relative_url(url, params),
+            parser,
+            headers,
+            body,
+        )
+
+    def result(self, request_id):
+        """Return the parsed result, raising the error if the request failed."""
+        result = self._results.get(request_id)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def async_execute(self):
+        """Send the requests in chunks of up to the MS Graph batch limit."""
+        request_ids = list(self._requests)
+        chunks = [
+            request_ids[i : i + GRAPH_BATCH_MAX_REQUESTS]
+            for i in range(0, len(request_ids), GRAPH_BATCH_MAX_REQUESTS)
+        ]
+        _LOGGER.debug(
+            "Sending %s request(s) in %s batch(es)", len(request_ids), len(chunks)
+        )
+        await asyncio.gather(*(self._async_send_chunk(chunk) for chunk in chunks))
+
+    async def _async_send_chunk(self, chunk):
+        async with self._semaphore:
+            await self._rate_limiter.async_acquire(self._priority)
+            try:
+                async with asyncio.timeout(self._timeout):
+                    await self._hass.async_add_executor_job(self._send_chunk, chunk)
+            except (RequestException, TimeoutError) as err:
+                for request_id in chunk:
+                    self._results.setdefault(request_id, err)
+
+    def _send_chunk(self, chunk):
+        """Post one $batch payload and parse the responses, runs in the executor."""
+        data = {"requests": []}
+        for index, request_id in enumerate(chunk):
+            url, _, headers, body = self._requests[request_id]
+            request = {"id": str(index), "method": "GET", "url": url}
+            if body is not None:
+                request["method"] = "POST"
+                request["body"] = body
+                # A sub-request body needs its content type
+                headers = {"Content-Type": "application/json"} | (headers or {})
+            if headers:
+                request["headers"] = headers
+            data["requests"].append(request)
+        response = self._account.con.post(self._batch_url, data=data)
+        if not response:
+            raise HTTPError(f"Batch request failed for: {self._batch_url}")
+
+        for item in response.json().get("responses", []):
+            request_id = chunk[int(item["id"])]
+            url, parser, *_ = self._requests[request_id]
+            status = item.get("status", 0)
+            body = item.get("body") or {}
+            if status >= 400:
+                message = body.get("error", {}).get("message", "")
+                # Keep the status and headers, such as Retry-After, for the caller
+                sub_response = Response()
+                sub_response.status_code = status
+                sub_response.headers.update(item.get("headers") or {})
+                self._results[request_id] = HTTPError(
+                    f"{status} Error for batched url: {url} | Error Message: {message}",
+                    response=sub_response,
+                )
+            else:
+                self._results[request_id] = parser(body)
+
+        for request_id in chunk:
+            self._results.setdefault(
+                request_id, HTTPError(f"No batch response for: {request_id}")
+            )
+
+    @property
+    def _batch_url(self):
+        return f"{self._account.protocol.service_url}{GRAPH_BATCH_ENDPOINT}"
+
+    def _relative_url(self, url, params):
+        """Sub-request urls are relative to the API version root."""
+        service_url = self._account.protocol.service_url
+        if url.startswith(service_url):
+            url = f"/{url[len(service_url) :]}"
+        if params:
+            query = urlencode(params, quote_via=quote, safe="$',()/:")
+            url = f"{url}?{query}"
+        return url
+
+
+# pylint: disable=protected-access
+# The builders below mirror the O365 library calls they replace, so need the
+# library's endpoints and cloud data key to build the same objects.
+
+
+def folder_messages_request(
+    mail_folder, limit, query, download_attachments, headers=None
+):
+    """Build the batch request for Folder.get_messages.
+
+    The parser returns an iterator, which follows the next links with the
+    headers until it has read limit messages, so must be read in the executor.
+    """
+    endpoint = "root_messages" if mail_folder.root else "folder_messages"
+    url = mail_folder.build_url(
+        mail_folder._endpoints.get(endpoint).format(id=mail_folder.folder_id)
+    )
+    top = min(limit, mail_folder.protocol.max_top_value)
+    params = {"$top": top} | query.as_params()
+
+    def constructor(message):
+        return mail_folder.message_constructor(
+            parent=mail_folder,
+            download_attachments=download_attachments,
+            **{mail_folder._cloud_data_key: message},
+        )
+
+    def parser(body):
+        return _paginate(mail_folder.con, body, limit, constructor, headers)
+
+    return url, params, parser
+
+
+def get_folder_messages(mail_folder, limit, query, download_attachments, headers):
+    """Get messages as Folder.get_messages does, sending extra headers.
+
+    Runs in the executor.
+    """
+    url, params, parser = folder_messages_request(
+        mail_folder, limit, query, download_attachments, headers
+    )
+    response = mail_folder.con.get(url, params=params, headers=dict(headers))
+    if not response:
+        return []
+    return parser(response.json())
+
+
+def _paginate(con, body, limit, constructor, headers=None):
+    """Yield the items of a page, then of the pages after it, up to limit.
+
+    A limit of None reads every page.
+    """
+    count = 0
+    while True:
+        items = body.get("value", [])
+        if limit is not None:
+            items = items[: limit - count]
+        for item in items:
+            count += 1
+            yield constructor(item)
+        if (limit is not None and count >= limit) or not (
+            next_link := body.get(NEXT_LINK)
+        ):
+            return
+        response = con.get(next_link, headers=dict(headers or ()))
+        if not response:
+            return
+        body = response.json()
+
+
+def get_folder_message(mail_folder, object_id, query, download_attachments, headers):
+    """Get a message as Folder.get_message does, sending extra headers.
+
+    Runs in the executor.
+    """
+    url = mail_folder.build_url(
+        mail_folder._endpoints.get("message").format(id=object_id)
+    )
+    params = None
+    if query and (query.has_selects or query.has_expands):
+        params = query.as_params()
+    response = mail_folder.con.get(url, params=params, headers=dict(headers))
+    if not response:
+        return None
+    return mail_folder.message_constructor(
+        parent=mail_folder,
+        download_attachments=download_attachments,
+        **{mail_folder._cloud_data_key: response.json()},
+    )
+
+
+def chats_request(teams, limit, expand):
+    """Build the request for Teams.get_my_chats, expanding the chats' details.
+
+    The parser returns each chat with its raw data, which keeps the expanded
+    lastMessagePreview and members that the Chat object does not.
+    """
+    url = teams.build_url(teams._endpoints.get("get_my_chats"))
+    params = {"$top": limit, "$expand": ",".join(expand)}
+
+    def parser(body):
+        return [
+            (teams.chat_constructor(parent=teams, **{teams._cloud_data_key: chat}), chat)
+            for chat in body.get("value", [])
+        ]
+
+    return url, params, parser
+
+
+def get_chats(teams, limit, expand):
+    """Get my chats with their expanded details, runs in the executor."""
+    url, params, parser = chats_request(teams, limit, expand)
+    response = teams.con.get(url, params=params)
+    if not response:
+        return []
+    return parser(response.json())
+
+
+def presence_request(teams, user_id=None):
+    """Build the batch request for Teams.get_my_presence/get_user_presence."""
+    if user_id:
+        endpoint = teams._endpoints.get("get_user_presence").format(user_id=user_id)
+    else:
+        endpoint = teams._endpoints.get("get_my_presence")
+
+    def parser(body):
+        return teams.presence_constructor(
+            parent=teams, **{teams._cloud_data_key: body}
+        )
+
+    return teams.build_url(endpoint), None, parser
+
+
+def get_presences_by_user_id(teams, user_ids):
+    """Get the presence of many users, keyed by user id, runs in the executor."""
+    url = teams.build_url(GRAPH_PRESENCES_ENDPOINT)
+    presences = {}
+    for i in range(0, len(user_ids), GRAPH_PRESENCES_MAX_IDS):
+        response = teams.con.post(
+            url, data={"ids": user_ids[i : i + GRAPH_PRESENCES_MAX_IDS]}
+        )
+        if not response:
+            raise HTTPError(f"Presence request failed for: {url}")
+        for presence in response.json().get("value", []):
+            presences[presence["id"]] = teams.presence_constructor(
+                parent=teams, **{teams._cloud_data_key: presence}
+            )
+    return presences
+
+
+def mailbox_settings_request(mailbox):
+    """Build the batch request for MailBox.get_settings."""
+
+    def parser(body):
+        return mailbox.mailbox_settings_constructor(
+            parent=mailbox, **{mailbox._cloud_data_key: body}
+        )
+
+    return mailbox.build_url(mailbox._endpoints.get("settings")), None, parser
+
+
+def tasks_request(task_folder, batch, query):
+    """Build the batch request for tasks Folder.get_tasks.
+
+    The parser returns an iterator, which follows the next links to read every
+    task in the list, so must be read in the executor.
+    """
+    url = task_folder.build_url(
+        task_folder._endpoints.get("get_tasks").format(id=task_folder.folder_id)
+    )
+    params = {"$top": batch} | query.as_params()
+
+    def constructor(task):
+        return task_folder.task_constructor(
+            parent=task_folder, **{task_folder._cloud_data_key: task}
+        )
+
+    def parser(body):
+        return _paginate(task_folder.con, body, None, constructor)
+
+    return url, params, parser
+
+
+def get_tasks(task_folder, batch, query):
+    """Get every task as Folder.get_tasks does, following the next links.
+
+    Runs in the executor.
+    """
+    url, params, parser = tasks_request(task_folder, batch, query)
+    response = task_folder.con.get(url, params=params)
+    if not response:
+        return []
+    return parser(response.json())
@@ -0,0 +1,56 @@
+"""In-memory caching."""
+
+import time
+from collections import OrderedDict
+
+
+class O365TTLCache:
+    """Size bounded cache whose entries expire after a time to live.
+
+    When full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize, ttl):
+        """Initialise the cache."""
+        self._maxsize = maxsize
+        self._ttl = ttl
+        # Key to (expiry, value), least recently used first
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        """Check whether the cache holds an unexpired entry, without counting it."""
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def __len__(self):
+        """Number of entries held, including any not yet found to be expired."""
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        """Hit, miss and size counts, for diagnostics."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def get(self, key):
+        """Return the cached value, None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        """Cache a value, evicting the least recently used entry when full."""
+        self._entries[key] = (time.monotonic() + self._ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop an entry, so it is read afresh."""
+        self._entries.pop(key, None)
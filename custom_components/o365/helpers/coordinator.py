@@ -1,23 +1,35 @@
 """Sensor processing."""
 
+import asyncio
 import functools as ft
 import logging
 from datetime import datetime, timedelta
 
 from homeassistant.const import CONF_EMAIL, CONF_ENABLED, CONF_NAME, CONF_UNIQUE_ID
+from homeassistant.core import callback
 from homeassistant.helpers import entity_registry
 from homeassistant.helpers.entity import async_generate_entity_id
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
-from requests.exceptions import HTTPError
-
 from O365.utils.query import (  # pylint: disable=no-name-in-module, import-error  # pylint: disable=no-name-in-module, import-error
     QueryBuilder,
 )
-
-from ..classes.mailsensor import async_build_inbox_query, async_build_query_query
+from requests.exceptions import HTTPError, RequestException
+
+from ..classes.mailsensor import (
+    async_build_inbox_query,
+    async_build_query_query,
+    async_build_select_query,
+    async_build_shared_query,
+    can_filter_locally,
+    download_attachment_content,
+    filter_messages,
+    request_headers,
+)
 from ..const import (
     ATTR_AUTOREPLIESSETTINGS,
+    ATTR_CHANGED,
     ATTR_CHAT_ID,
     ATTR_CHAT_TYPE,
     ATTR_CONTENT,
@@ -33,45 +45,238 @@ from ..const import (
     ATTR_TOPIC,
     CONF_ACCOUNT,
     CONF_ACCOUNT_NAME,
+    CONF_ADAPTIVE_POLLING,
     CONF_AUTO_REPLY_SENSORS,
+    CONF_BATCH_REQUESTS,
+    CONF_CHAT_MEMBER_CACHE,
     CONF_CHAT_SENSORS,
-    CONF_DOWNLOAD_ATTACHMENTS,
+    CONF_DELTA_SYNC,
     CONF_EMAIL_ACCOUNT,
     CONF_EMAIL_SENSORS,
     CONF_ENABLE_UPDATE,
     CONF_ENTITY_KEY,
     CONF_ENTITY_TYPE,
+    CONF_HAS_ATTACHMENT,
+    CONF_IMPORTANCE,
+    CONF_IS_UNREAD,
     CONF_MAIL_FOLDER,
+    CONF_MAILBOX_REGISTRY,
+    CONF_MAX_CONCURRENT_UPDATES,
     CONF_MAX_ITEMS,
+    CONF_O365_DELTA,
     CONF_O365_MAIL_FOLDER,
     CONF_O365_TASK_FOLDER,
     CONF_QUERY,
     CONF_QUERY_SENSORS,
+    CONF_RATE_LIMITER,
     CONF_SENSOR_CONF,
     CONF_STATUS_SENSORS,
+    CONF_THROTTLE,
     CONF_TODO_SENSORS,
     CONF_TRACK,
+    CONF_UPDATE_TIMEOUT,
     CONF_YAML_TASK_LIST,
     CONF_YAML_TASK_LIST_ID,
     DOMAIN,
     ENTITY_ID_FORMAT_SENSOR,
     ENTITY_ID_FORMAT_TODO,
+    GRAPH_CHAT_MEMBERS,
+    GRAPH_CHAT_MEMBERSHIP_EVENTS,
+    GRAPH_CHAT_PREVIEW,
+    JSON_MAIL_DELTA_FILENAME,
+    JSON_TODO_DELTA_FILENAME,
     LEGACY_ACCOUNT_NAME,
+    POLL_INTERVALS,
+    POLL_TICK,
+    PUSH_REFRESH_DELAY,
+    PUSH_SAFETY_POLL,
     SENSOR_AUTO_REPLY,
     SENSOR_EMAIL,
     SENSOR_TEAMS_CHAT,
     SENSOR_TEAMS_STATUS,
+    SHARED_FETCH_FACTOR,
+    THROTTLE_DIRECTORY,
+    THROTTLE_OUTLOOK,
+    THROTTLE_PRESENCE,
+    THROTTLE_RESOURCES,
+    THROTTLE_TEAMS,
+    THROTTLE_TODO,
     TODO_TODO,
     YAML_TASK_LISTS_FILENAME,
 )
 from ..schema import YAML_TASK_LIST_SCHEMA
-from ..todo import O365TodoEntityServices, async_build_todo_query
+from ..todo import O365TodoEntityServices, async_build_todo_query, filter_todos
 from ..utils.filemgmt import build_config_file_path, build_yaml_filename, load_yaml_file
+from .batch import (
+    O365BatchRequest,
+    chats_request,
+    folder_messages_request,
+    get_chats,
+    get_folder_messages,
+    get_presences_by_user_id,
+    get_tasks,
+    mailbox_settings_request,
+    presence_request,
+    tasks_request,
+)
+from .delta import O365DeltaStore, O365MailDelta, O365TodoDelta
+from .push import build_push_resource
+from .throttle import is_throttle_error
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class O365SensorCordinator(DataUpdateCoordinator):
+class O365KeyCordinator(DataUpdateCoordinator):
+    """O365 data update coordinator refreshing each key on its own schedule or by push."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the key scheduling."""
+        super().__init__(*args, **kwargs)
+        self._pushed_keys = set()
+        self._push_pending = set()
+        self._push_unsub = None
+        # Polling intervals and waits are counted in coordinator ticks
+        self._poll_intervals = {}
+        self._poll_waits = {}
+        self._poll_fingerprints = {}
+
+    def _seed_data(self):
+        """Give every key empty data, kept until its first successful update.
+
+        Entities read their key's data as soon as they are added, and a key
+        can fail its first update while the others succeed.
+        """
+        for key in self._keys:
+            self._data.setdefault(key[CONF_ENTITY_KEY], _empty_data(key))
+
+    def _due_keys(self):
+        """Keys due a poll this tick.
+
+        Keys kept up to date by push are still polled now and then, in case
+        notifications have been lost without the subscription lapsing.
+        """
+        keys = []
+        for key in self._keys:
+            entity_key = key[CONF_ENTITY_KEY]
+            # Held until the backoff ends, then polled straight away
+            resource = THROTTLE_RESOURCES[key[CONF_ENTITY_TYPE]]
+            if self._throttle.throttled_until(resource):
+                continue
+            self._poll_waits[entity_key] = self._poll_waits.get(entity_key, 1) - 1
+            if self._poll_waits[entity_key] <= 0:
+                keys.append(key)
+        return keys
+
+    def _adapt_poll_intervals(self, keys, results):
+        """Back off keys whose data did not change, tighten those that did."""
+        for key, result in zip(keys, results, strict=True):
+            entity_key = key[CONF_ENTITY_KEY]
+            min_ticks, max_ticks = self._poll_range(key)
+            interval = self._poll_intervals.get(entity_key, min_ticks)
+            if not isinstance(result, Exception):
+                fingerprint = _fingerprint(self._data.get(entity_key))
+                if fingerprint == self._poll_fingerprints.get(entity_key):
+                    interval = min(interval * 2, max_ticks)
+                else:
+                    interval = min_ticks
+                self._poll_fingerprints[entity_key] = fingerprint
+            self._poll_intervals[entity_key] = interval
+            self._poll_waits[entity_key] = self._poll_wait(entity_key, interval)
+
+    def _poll_wait(self, entity_key, interval):
+        if entity_key in self._pushed_keys:
+            return max(interval, PUSH_SAFETY_POLL // POLL_TICK)
+        return interval
+
+    def _poll_range(self, key):
+        if not self._config[CONF_ADAPTIVE_POLLING]:
+            return 1, 1
+        min_seconds, max_seconds = POLL_INTERVALS[key[CONF_ENTITY_TYPE]]
+        return max(min_seconds // POLL_TICK, 1), max(max_seconds // POLL_TICK, 1)
+
+    async def async_refresh_key(self, entity_key):
+        """Refresh a key now, such as after it has been changed from HA.
+
+        Only the key is fetched, and its polling starts again from its shortest
+        interval. The other keys keep their schedules.
+        """
+        keys = [key for key in self._keys if key[CONF_ENTITY_KEY] == entity_key]
+        self._poll_intervals.pop(entity_key, None)
+        results = await self._async_refresh_keys(keys)
+        self._adapt_poll_intervals(keys, results)
+
+    async def _async_refresh_keys(self, keys):
+        """Fetch just the keys and update the listeners, without a coordinator refresh.
+
+        A coordinator refresh would count down every key's wait and reschedule
+        the next poll.
+        """
+        results = await asyncio.gather(
+            *(self._async_key_update(key, None) for key in keys),
+            return_exceptions=True,
+        )
+        try:
+            _check_key_results(keys, results, self._account_name)
+        except UpdateFailed:
+            return results
+        await self._delta_store.async_save(_delta_trackers(self._keys))
+        self.async_update_listeners()
+        return results
+
+    async def async_setup_push(self, push_manager):
+        """Register the keys which support change notifications."""
+        for key in self._keys:
+            if subscription := await self._async_push_subscription(key):
+                push_manager.async_register(
+                    *subscription,
+                    ft.partial(self._async_push_notify, key),
+                    ft.partial(self._async_push_status, key),
+                )
+
+    async def _async_push_subscription(self, key):
+        """Resource and change type to subscribe to for a key, None to poll it."""
+
+    @callback
+    def _async_push_notify(self, key):
+        # Notifications come in bursts, so gather them into one refresh
+        self._push_pending.add(key[CONF_ENTITY_KEY])
+        if not self._push_unsub:
+            self._push_unsub = async_call_later(
+                self.hass, PUSH_REFRESH_DELAY, self._async_push_refresh
+            )
+
+    @callback
+    def _async_push_status(self, key, active):
+        entity_key = key[CONF_ENTITY_KEY]
+        if active:
+            _LOGGER.debug("Push notifications active for: %s", key[CONF_NAME])
+            self._pushed_keys.add(entity_key)
+            self._poll_waits[entity_key] = self._poll_wait(entity_key, 1)
+        elif entity_key in self._pushed_keys:
+            _LOGGER.warning(
+                "Push notifications lapsed for: %s, using polling", key[CONF_NAME]
+            )
+            self._pushed_keys.discard(entity_key)
+            # Changes may have been missed while the subscription was lapsing
+            self._poll_waits[entity_key] = 1
+
+    async def _async_push_refresh(self, _now):
+        self._push_unsub = None
+        keys = [key for key in self._keys if key[CONF_ENTITY_KEY] in self._push_pending]
+        self._push_pending.clear()
+        _LOGGER.debug(
+            "Doing %s pushed update(s) for: %s", len(keys), self._account_name
+        )
+        await self._async_refresh_keys(keys)
+        # Up to date, so the safety poll can wait its full interval again
+        for key in keys:
+            entity_key = key[CONF_ENTITY_KEY]
+            self._poll_waits[entity_key] = self._poll_wait(
+                entity_key, self._poll_intervals.get(entity_key, 1)
+            )
+
+
+class O365SensorCordinator(O365KeyCordinator):
     """O365 sensor data update coordinator."""
 
     def __init__(self, hass, config):
@@ -82,7 +287,7 @@ class O365SensorCordinator(DataUpdateCoordinator):
             # Name of the data. For logging purposes.
             name="O365 Sensors",
             # Polling interval. Will only be polled if there are subscribers.
-            update_interval=timedelta(seconds=30),
+            update_interval=timedelta(seconds=POLL_TICK),
         )
         self._config = config
         self._account = config[CONF_ACCOUNT]
@@ -92,9 +297,18 @@ class O365SensorCordinator(DataUpdateCoordinator):
         self._zero_date = datetime(
             1, 1, 1, 0, 0, 0, tzinfo=dt_util.get_default_time_zone()
         )
-        self._chat_members = {}
+        # Chat id to (last update, last message id, state, extra attributes)
+        self._chat_messages = {}
+        self._chat_member_cache = config[CONF_CHAT_MEMBER_CACHE]
+        self._mailboxes = config[CONF_MAILBOX_REGISTRY]
+        self._chat_ids = set()
         self._ent_reg = entity_registry.async_get(hass)
         self._builder = QueryBuilder(protocol=self._account.protocol)
+        self._semaphore = asyncio.Semaphore(config[CONF_MAX_CONCURRENT_UPDATES])
+        self._batch_requests = config[CONF_BATCH_REQUESTS]
+        self._rate_limiter = config[CONF_RATE_LIMITER]
+        self._throttle = config[CONF_THROTTLE]
+        self._delta_store = O365DeltaStore(hass, config, JSON_TODO_DELTA_FILENAME)
 
     async def async_setup_entries(self):
         """Do the initial setup of the entities."""
@@ -103,6 +317,7 @@ class O365SensorCordinator(DataUpdateCoordinator):
         todo_keys = await self._async_todo_sensors()
         auto_reply_entities = await self._async_auto_reply_sensors()
         self._keys = chat_keys + status_keys + todo_keys + auto_reply_entities
+        self._seed_data()
         return self._keys
 
     async def _async_status_sensors(self):
@@ -120,7 +335,8 @@ class O365SensorCordinator(DataUpdateCoordinator):
                 CONF_EMAIL: sensor_conf.get(CONF_EMAIL),
             }
             if sensor_conf.get(CONF_EMAIL):
-                email_account = await self.hass.async_add_executor_job(
+                email_account = await self._throttle.async_call(
+                    THROTTLE_DIRECTORY,
                     self._account.directory().get_user,
                     sensor_conf.get(CONF_EMAIL),
                 )
@@ -163,11 +379,13 @@ class O365SensorCordinator(DataUpdateCoordinator):
                 YAML_TASK_LIST_SCHEMA,
             )
             o365_task_lists = list(o365_task_dict.values())
-            keys = await self._async_todo_entities(o365_task_lists)
+            keys = await self._async_todo_entities(
+                o365_task_lists, todo_sensors.get(CONF_DELTA_SYNC)
+            )
 
         return keys
 
-    async def _async_todo_entities(self, o365_task_lists):
+    async def _async_todo_entities(self, o365_task_lists, delta_sync):
         keys = []
         o365_tasks = await self.hass.async_add_executor_job(self._account.tasks)
         for o365_tasklist in o365_task_lists:
@@ -181,11 +399,9 @@ class O365SensorCordinator(DataUpdateCoordinator):
             else:
                 name = o365_tasklist.get(CONF_NAME)
             try:
-                o365_task = await self.hass.async_add_executor_job(  # pylint: disable=no-member
-                    ft.partial(
-                        o365_tasks.get_folder,
-                        folder_id=o365_task_list_id,
-                    )
+                o365_task = await self._throttle.async_call(
+                    THROTTLE_TODO,
+                    ft.partial(o365_tasks.get_folder, folder_id=o365_task_list_id),
                 )
                 unique_id = f"{o365_task_list_id}_{self._account_name}"
                 new_key = {
@@ -198,6 +414,10 @@ class O365SensorCordinator(DataUpdateCoordinator):
                     CONF_YAML_TASK_LIST: o365_tasklist,
                     CONF_ENTITY_TYPE: TODO_TODO,
                 }
+                if delta_sync:
+                    new_key[CONF_O365_DELTA] = O365TodoDelta(
+                        o365_task, await self._delta_store.async_get(unique_id)
+                    )
 
                 keys.append(new_key)
                 # To be deleted in mid 2024 after majority have migrated
@@ -230,63 +450,163 @@ class O365SensorCordinator(DataUpdateCoordinator):
         return keys
 
     async def _async_update_data(self):
+        keys = self._due_keys()
         _LOGGER.debug(
-            "Doing %s sensor update(s) for: %s", len(self._keys), self._account_name
+            "Doing %s sensor update(s) for: %s", len(keys), self._account_name
         )
 
-        for key in self._keys:
+        batch = await self._async_build_batch(keys) if self._batch_requests else None
+        presences = await self._async_get_presences(keys)
+        results = await asyncio.gather(
+            *(self._async_key_update(key, batch, presences) for key in keys),
+            return_exceptions=True,
+        )
+        self._adapt_poll_intervals(keys, results)
+        _check_key_results(keys, results, self._account_name)
+        await self._delta_store.async_save(_delta_trackers(self._keys))
+
+        return self._data
+
+    async def _async_get_presences(self, keys):
+        """Get the presence of all the other users being tracked in one call."""
+        user_ids = list(
+            dict.fromkeys(
+                key[CONF_EMAIL_ACCOUNT]
+                for key in keys
+                if key[CONF_ENTITY_TYPE] == SENSOR_TEAMS_STATUS
+                and key.get(CONF_EMAIL_ACCOUNT)
+            )
+        )
+        if not user_ids:
+            return {}
+        try:
+            return await self._throttle.async_call(
+                THROTTLE_PRESENCE,
+                get_presences_by_user_id,
+                self._account.teams(),
+                user_ids,
+            )
+        except RequestException as err:
+            return dict.fromkeys(user_ids, err)
+
+    async def _async_build_batch(self, keys):
+        """Batch the reads for all keys.
+
+        Other users' presence is read in bulk, so is not batched.
+        """
+        batch = O365BatchRequest(
+            self.hass, self._account, self._semaphore, self._rate_limiter
+        )
+        for key in keys:
+            entity_type = key[CONF_ENTITY_TYPE]
+            if entity_type == TODO_TODO and CONF_O365_DELTA not in key:
+                full_query = await async_build_todo_query(self._builder, key)
+                request = tasks_request(key[CONF_O365_TASK_FOLDER], 100, full_query)
+            elif entity_type == SENSOR_TEAMS_STATUS and not key.get(CONF_EMAIL_ACCOUNT):
+                request = presence_request(self._account.teams())
+            elif entity_type == SENSOR_AUTO_REPLY:
+                request = mailbox_settings_request(
+                    await self._mailboxes.async_get_mailbox()
+                )
+            elif entity_type == SENSOR_TEAMS_CHAT:
+                request = chats_request(
+                    self._account.teams(), 20, self._chat_expand(key)
+                )
+            else:
+                continue
+            batch.add(key[CONF_ENTITY_KEY], *request)
+
+        await batch.async_execute()
+        return batch
+
+    async def _async_push_subscription(self, key):
+        entity_type = key[CONF_ENTITY_TYPE]
+        if entity_type == TODO_TODO:
+            task_folder = key[CONF_O365_TASK_FOLDER]
+            return (
+                build_push_resource(
+                    task_folder, f"/todo/lists/{task_folder.folder_id}/tasks"
+                ),
+                "created,updated,deleted",
+            )
+        if entity_type == SENSOR_TEAMS_CHAT:
+            return "me/chats/getAllMessages", "created,updated"
+        if entity_type == SENSOR_TEAMS_STATUS:
+            if not (user_id := key.get(CONF_EMAIL_ACCOUNT)):
+                try:
+                    user = await self._throttle.async_call(
+                        THROTTLE_DIRECTORY, self._account.directory().get_current_user
+                    )
+                except HTTPError:
+                    return None
+                user_id = user.object_id
+            return f"communications/presences/{user_id}", "updated"
+        # Mailbox settings do not support change notifications
+        return None
+
+    async def _async_key_update(self, key, batch, presences=None):
+        async with self._semaphore:
             entity_type = key[CONF_ENTITY_TYPE]
             _LOGGER.debug("%s for: %s", entity_type, self._account_name)
             if entity_type == TODO_TODO:
-                await self._async_todos_update(key)
+                await self._async_todos_update(key, batch)
             elif entity_type == SENSOR_TEAMS_CHAT:
-                await self._async_teams_chat_update(key)
+                await self._async_teams_chat_update(key, batch)
             elif entity_type == SENSOR_TEAMS_STATUS:
-                await self._async_teams_status_update(key)
+                await self._async_teams_status_update(key, batch, presences)
             elif entity_type == SENSOR_AUTO_REPLY:
-                await self._async_auto_reply_update(key)
+                await self._async_auto_reply_update(key, batch)
 
-        return self._data
-
-    async def _async_teams_status_update(self, key):
+    async def _async_teams_status_update(self, key, batch, presences):
         """Update state."""
         entity_key = key[CONF_ENTITY_KEY]
         email_account = key.get(CONF_EMAIL_ACCOUNT)
         if not email_account:
-            if data := await self.hass.async_add_executor_job(
-                self._account.teams().get_my_presence
+            if data := await _async_fetch(
+                self._throttle, batch, key, self._account.teams().get_my_presence
             ):
                 self._data[entity_key] = {ATTR_STATE: data.activity}
             return
-        if data := await self.hass.async_add_executor_job(
-            self._account.teams().get_user_presence, email_account
+        # Pushed updates are made one key at a time, so have no bulk read
+        if presences is not None:
+            data = presences.get(email_account)
+            if isinstance(data, Exception):
+                raise data
+            if data:
+                self._data[entity_key] = {ATTR_STATE: data.activity}
+            return
+        if data := await _async_fetch(
+            self._throttle,
+            batch,
+            key,
+            self._account.teams().get_user_presence,
+            email_account,
         ):
             self._data[entity_key] = {ATTR_STATE: data.activity}
 
-    async def _async_teams_chat_update(self, key):
+    async def _async_teams_chat_update(self, key, batch):
         entity_key = key[CONF_ENTITY_KEY]
         state = None
         data = []
-        self._data[entity_key] = {}
         extra_attributes = {}
-        chats = await self.hass.async_add_executor_job(
-            ft.partial(self._account.teams().get_my_chats, limit=20)
+        teams = self._account.teams()
+        chats = await _async_fetch(
+            self._throttle, batch, key, get_chats, teams, 20, self._chat_expand(key)
         )
-        for chat in chats:
+        for chat, chat_data in chats:
             if chat.chat_type == "unknownFutureValue":
                 continue
             if not state:
-                messages = await self.hass.async_add_executor_job(
-                    ft.partial(chat.get_messages, limit=10)
+                state, extra_attributes = await self._async_get_last_message(
+                    chat, chat_data
                 )
-                state, extra_attributes = self._process_chat_messages(messages)
 
             if not key[CONF_ENABLE_UPDATE]:
                 if state:
                     break
                 continue
 
-            memberlist = await self._async_get_memberlist(chat)
+            memberlist = await self._async_get_memberlist(chat, chat_data)
             chatitems = {
                 ATTR_CHAT_ID: chat.object_id,
                 ATTR_CHAT_TYPE: chat.chat_type,
@@ -297,9 +617,78 @@ class O365SensorCordinator(DataUpdateCoordinator):
 
             data.append(chatitems)
 
+        if key[CONF_ENABLE_UPDATE]:
+            self._chat_ids = {item[ATTR_CHAT_ID] for item in data}
         self._data[entity_key] = (
-            {ATTR_STATE: state} | extra_attributes | {ATTR_DATA: data}
+            _empty_data(key)
+            | {ATTR_STATE: state}
+            | extra_attributes
+            | {ATTR_DATA: data}
+        )
+
+    def _chat_expand(self, key):
+        """Chat details to expand when listing chats.
+
+        Members are only shown when updates are enabled, and are only expanded
+        when the member cache is missing a chat seen last time.
+        """
+        if key[CONF_ENABLE_UPDATE] and (
+            not self._chat_ids
+            or any(chat_id not in self._chat_member_cache for chat_id in self._chat_ids)
+        ):
+            return (GRAPH_CHAT_PREVIEW, GRAPH_CHAT_MEMBERS)
+        return (GRAPH_CHAT_PREVIEW,)
+
+    async def _async_get_memberlist(self, chat, chat_data):
+        """Get the chat's member names, from the expanded members or the cache.
+
+        A cached list is read again once the chat has been updated, or when its
+        last message shows that members were added or removed.
+        """
+        preview = chat_data.get(GRAPH_CHAT_PREVIEW) or {}
+        preview_id = preview.get("id")
+        if GRAPH_CHAT_MEMBERS in chat_data:
+            memberlist = _build_memberlist(chat_data[GRAPH_CHAT_MEMBERS])
+        else:
+            cached = self._chat_member_cache.get(chat.object_id)
+            membership_event = (preview.get("eventDetail") or {}).get(
+                "@odata.type"
+            ) in GRAPH_CHAT_MEMBERSHIP_EVENTS
+            if (
+                cached
+                and cached[0] == chat.last_update_date
+                and not (membership_event and cached[1] != preview_id)
+            ):
+                return cached[2]
+            self._chat_member_cache.invalidate(chat.object_id)
+            members = await self._throttle.async_call(THROTTLE_TEAMS, chat.get_members)
+            memberlist = _build_memberlist(
+                {"displayName": member.display_name, "email": member.email}
+                for member in members
+            )
+        self._chat_member_cache.set(
+            chat.object_id, (chat.last_update_date, preview_id, memberlist)
         )
+        return memberlist
+
+    async def _async_get_last_message(self, chat, chat_data):
+        """Get the chat's last message, only reading messages if the chat changed.
+
+        The preview carries neither importance, subject nor summary, so a
+        changed chat still needs its messages read.
+        """
+        if not (preview := chat_data.get(GRAPH_CHAT_PREVIEW)):
+            return None, {}
+        version = (chat.last_update_date, preview.get("id"))
+        cached = self._chat_messages.get(chat.object_id)
+        if cached and cached[:2] == version:
+            return cached[2:]
+        messages = await self._throttle.async_call(
+            THROTTLE_TEAMS, ft.partial(chat.get_messages, limit=10)
+        )
+        state, extra_attributes = self._process_chat_messages(messages)
+        self._chat_messages[chat.object_id] = (*version, state, extra_attributes)
+        return state, extra_attributes
 
     def _process_chat_messages(self, messages):
         state = None
@@ -318,51 +707,53 @@ class O365SensorCordinator(DataUpdateCoordinator):
                 break
         return state, extra_attributes
 
-    async def _async_get_memberlist(self, chat):
-        if chat.object_id in self._chat_members and chat.chat_type != "oneOnOne":
-            return self._chat_members[chat.object_id]
-        members = await self.hass.async_add_executor_job(chat.get_members)
-        memberlist = []
-        for member in members:
-            if member.display_name:
-                memberlist.append(member.display_name)
-            elif member.email:
-                memberlist.append(member.email)
-            else:
-                memberlist.append("Name Unknown")
-        self._chat_members[chat.object_id] = memberlist
-        return memberlist
-
-    async def _async_todos_update(self, key):
+    async def _async_todos_update(self, key, batch):
         """Update state."""
         entity_key = key[CONF_ENTITY_KEY]
-        if entity_key in self._data:
-            error = self._data[entity_key][ATTR_ERROR]
-        else:
-            self._data[entity_key] = {ATTR_TODOS: {}, ATTR_STATE: 0}
-            error = False
-        data, error = await self._async_todos_update_query(key, error)
+        # A throttled update raises before setting the error, so it may be unset
+        error = self._data[entity_key].get(ATTR_ERROR, False)
+        data, error = await self._async_todos_update_query(key, error, batch)
         if not error:
-            self._data[entity_key][ATTR_DATA] = await self.hass.async_add_executor_job(
-                list, data
-            )
+            if CONF_O365_DELTA in key:
+                todos, changed = data
+                self._data[entity_key][ATTR_DATA] = filter_todos(
+                    todos, key[CONF_YAML_TASK_LIST]
+                )
+                self._data[entity_key][ATTR_CHANGED] = changed
+            else:
+                self._data[entity_key][ATTR_DATA] = await self._throttle.async_call(
+                    THROTTLE_TODO, list, data
+                )
 
         self._data[entity_key][ATTR_ERROR] = error
 
-    async def _async_todos_update_query(self, key, error):
+    async def _async_todos_update_query(self, key, error, batch):
         data = None
         o365_task = key[CONF_O365_TASK_FOLDER]
         full_query = await async_build_todo_query(self._builder, key)
         name = key[CONF_NAME]
 
         try:
-            data = await self.hass.async_add_executor_job(  # pylint: disable=no-member
-                ft.partial(o365_task.get_tasks, batch=100, query=full_query)
-            )
+            if todo_delta := key.get(CONF_O365_DELTA):
+                data = await self._throttle.async_call(
+                    THROTTLE_TODO, todo_delta.get_tasks
+                )
+            else:
+                data = await _async_fetch(  # pylint: disable=no-member
+                    self._throttle,
+                    batch,
+                    key,
+                    get_tasks,
+                    o365_task,
+                    100,
+                    full_query,
+                )
             if error:
                 _LOGGER.info("O365 Task list reconnected for: %s", name)
                 error = False
-        except HTTPError:
+        except HTTPError as err:
+            if is_throttle_error(err):
+                raise
             if not error:
                 _LOGGER.error(
                     "O365 Task list not found for: %s - Has it been deleted?",
@@ -372,19 +763,18 @@ class O365SensorCordinator(DataUpdateCoordinator):
 
         return data, error
 
-    async def _async_auto_reply_update(self, key):
+    async def _async_auto_reply_update(self, key, batch):
         """Update state."""
         entity_key = key[CONF_ENTITY_KEY]
-        if data := await self.hass.async_add_executor_job(
-            self._account.mailbox().get_settings
-        ):
+        mailbox = await self._mailboxes.async_get_mailbox()
+        if data := await _async_fetch(self._throttle, batch, key, mailbox.get_settings):
             self._data[entity_key] = {
                 ATTR_STATE: data.automaticrepliessettings.status.value,
                 ATTR_AUTOREPLIESSETTINGS: data.automaticrepliessettings,
             }
 
 
-class O365EmailCordinator(DataUpdateCoordinator):
+class O365EmailCordinator(O365KeyCordinator):
     """O365 email data update coordinator."""
 
     def __init__(self, hass, config):
@@ -395,7 +785,7 @@ class O365EmailCordinator(DataUpdateCoordinator):
             # Name of the data. For logging purposes.
             name="O365 Email",
             # Polling interval. Will only be polled if there are subscribers.
-            update_interval=timedelta(seconds=30),
+            update_interval=timedelta(seconds=POLL_TICK),
         )
         self._hass = hass
         self._config = config
@@ -406,15 +796,23 @@ class O365EmailCordinator(DataUpdateCoordinator):
         self._zero_date = datetime(
             1, 1, 1, 0, 0, 0, tzinfo=dt_util.get_default_time_zone()
         )
-        self._chat_members = {}
         self._ent_reg = entity_registry.async_get(hass)
         self._builder = QueryBuilder(protocol=self._account.protocol)
+        self._semaphore = asyncio.Semaphore(config[CONF_MAX_CONCURRENT_UPDATES])
+        self._batch_requests = config[CONF_BATCH_REQUESTS]
+        self._update_timeout = config[CONF_UPDATE_TIMEOUT]
+        self._rate_limiter = config[CONF_RATE_LIMITER]
+        self._throttle = config[CONF_THROTTLE]
+        self._delta_store = O365DeltaStore(hass, config, JSON_MAIL_DELTA_FILENAME)
+        self._delta_syncs = set()
+        self._mailboxes = config[CONF_MAILBOX_REGISTRY]
 
     async def async_setup_entries(self):
         """Do the initial setup of the entities."""
         email_keys = await self._async_email_sensors()
         query_keys = await self._async_query_sensors()
         self._keys = email_keys + query_keys
+        self._seed_data()
         return self._keys
 
     async def _async_email_sensors(self):
@@ -438,6 +836,16 @@ class O365EmailCordinator(DataUpdateCoordinator):
                         sensor_conf, self._builder
                     ),
                 }
+                if sensor_conf.get(CONF_DELTA_SYNC):
+                    new_key[CONF_O365_DELTA] = O365MailDelta(
+                        mail_folder,
+                        sensor_conf.get(CONF_MAX_ITEMS, 5),
+                        sensor_conf.get(CONF_IS_UNREAD),
+                        await self._delta_store.async_get(new_key[CONF_UNIQUE_ID]),
+                    )
+                    new_key[CONF_QUERY] = await async_build_select_query(
+                        sensor_conf, self._builder
+                    )
 
                 # Renames unique id to ensure uniqueness - To be deleted in early 2025
                 entity = self._ent_reg.async_get(new_key[CONF_ENTITY_KEY])
@@ -491,74 +899,340 @@ class O365EmailCordinator(DataUpdateCoordinator):
 
     async def _async_get_mail_folder(self, sensor_conf, sensor_type):
         """Get the configured folder."""
-        mailbox = await self.hass.async_add_executor_job(self._account.mailbox)
         _LOGGER.debug("Get mail folder: %s", sensor_conf.get(CONF_NAME))
-        if mail_folder_conf := sensor_conf.get(CONF_MAIL_FOLDER):
-            return await self._async_get_configured_mail_folder(
-                mail_folder_conf, mailbox, sensor_type
-            )
+        return await self._mailboxes.async_get_folder(
+            sensor_conf.get(CONF_MAIL_FOLDER), sensor_type
+        )
 
-        return await self.hass.async_add_executor_job(mailbox.inbox_folder)
+    async def _async_update_data(self):
+        keys = self._due_keys()
+        _LOGGER.debug("Doing %s email update(s) for: %s", len(keys), self._account_name)
+
+        fetches = await self._async_plan_shared_fetches(keys)
+        batch = (
+            await self._async_build_batch(keys, fetches)
+            if self._batch_requests
+            else None
+        )
+        shared = await self._async_shared_fetches(fetches, batch)
+        results = await asyncio.gather(
+            *(self._async_key_update(key, batch, shared) for key in keys),
+            return_exceptions=True,
+        )
+        self._adapt_poll_intervals(keys, results)
+        _check_key_results(keys, results, self._account_name)
+        await self._delta_store.async_save(_delta_trackers(self._keys))
 
-    async def _async_get_configured_mail_folder(
-        self, mail_folder_conf, mailbox, sensor_type
-    ):
-        mail_folder = mailbox
-        _LOGGER.debug("Get folder %s - start", mail_folder_conf)
-
-        for folder in mail_folder_conf.split("/"):
-            mail_folder = await self.hass.async_add_executor_job(
-                ft.partial(
-                    mail_folder.get_folder,
-                    folder_name=folder,
-                )
+        return self._data
+
+    async def _async_plan_shared_fetches(self, keys):
+        """Plan one fetch for the keys reading the same folder.
+
+        Keys whose filters can be applied locally share a fetch of the newest
+        emails in the folder, selecting the fields and number of emails that
+        all of them need, up to a page. Keys wanting bodies as plain text are
+        fetched apart, as MS Graph converts every body in the response.
+        """
+        groups = {}
+        for key in keys:
+            sensor_conf = key[CONF_SENSOR_CONF]
+            if CONF_O365_DELTA in key or not can_filter_locally(sensor_conf):
+                continue
+            # Keep fetches with attachment content apart, as those download it all
+            download_attachments = download_attachment_content(sensor_conf)
+            text_body = bool(request_headers(sensor_conf))
+            fetch_id = (
+                f"{key[CONF_O365_MAIL_FOLDER].folder_id}"
+                f"_{download_attachments}_{text_body}"
             )
-            _LOGGER.debug("Get folder %s - process - %s", mail_folder_conf, mail_folder)
-            if not mail_folder:
-                _LOGGER.error(
-                    "Folder - %s - not found from %s config entry - %s - entity not created",
-                    folder,
-                    sensor_type,
-                    mail_folder_conf,
-                )
-                return None
+            groups.setdefault(fetch_id, []).append(key)
 
-        _LOGGER.debug("Get folder %s - finish ", mail_folder_conf)
-        return mail_folder
+        fetches = {}
+        for fetch_id, group_keys in groups.items():
+            if len(group_keys) < 2:
+                continue
+            sensor_confs = [key[CONF_SENSOR_CONF] for key in group_keys]
+            limit = max(_shared_fetch_size(sensor_conf) for sensor_conf in sensor_confs)
+            fetches[fetch_id] = (
+                group_keys[0][CONF_O365_MAIL_FOLDER],
+                min(limit, self._account.protocol.max_top_value),
+                await async_build_shared_query(sensor_confs, self._builder),
+                download_attachment_content(group_keys[0][CONF_SENSOR_CONF]),
+                request_headers(group_keys[0][CONF_SENSOR_CONF]),
+                group_keys,
+            )
+        return fetches
+
+    async def _async_shared_fetches(self, fetches, batch):
+        """Make the shared fetches, returning the emails and limit for each key."""
+        results = await asyncio.gather(
+            *(
+                self._async_shared_fetch(fetch_id, fetch, batch)
+                for fetch_id, fetch in fetches.items()
+            ),
+            return_exceptions=True,
+        )
+        shared = {}
+        for (_, limit, *_, group_keys), result in zip(
+            fetches.values(), results, strict=True
+        ):
+            for key in group_keys:
+                shared[key[CONF_ENTITY_KEY]] = (result, limit)
+        return shared
+
+    async def _async_shared_fetch(self, fetch_id, fetch, batch):
+        mail_folder, limit, query, download_attachments, headers, _ = fetch
+        async with self._semaphore:
+            async with asyncio.timeout(self._update_timeout):
+                if batch and fetch_id in batch:
+                    data = self._throttle.call(THROTTLE_OUTLOOK, batch.result, fetch_id)
+                else:
+                    data = await self._throttle.async_call(
+                        THROTTLE_OUTLOOK,
+                        get_folder_messages,
+                        mail_folder,
+                        limit,
+                        query,
+                        download_attachments,
+                        headers,
+                    )
+                return await self._throttle.async_call(THROTTLE_OUTLOOK, list, data)
+
+    async def _async_build_batch(self, keys, fetches):
+        batch = O365BatchRequest(
+            self.hass,
+            self._account,
+            self._semaphore,
+            self._rate_limiter,
+            self._update_timeout,
+        )
+        shared_keys = {
+            key[CONF_ENTITY_KEY]
+            for *_, group_keys in fetches.values()
+            for key in group_keys
+        }
+        for key in keys:
+            if CONF_O365_DELTA in key or key[CONF_ENTITY_KEY] in shared_keys:
+                continue
+            sensor_conf = key[CONF_SENSOR_CONF]
+            headers = request_headers(sensor_conf)
+            batch.add(
+                key[CONF_ENTITY_KEY],
+                *folder_messages_request(
+                    key[CONF_O365_MAIL_FOLDER],
+                    sensor_conf.get(CONF_MAX_ITEMS, 5),
+                    key[CONF_QUERY],
+                    download_attachment_content(sensor_conf),
+                    headers,
+                ),
+                headers,
+            )
+        for fetch_id, fetch in fetches.items():
+            batch.add(fetch_id, *folder_messages_request(*fetch[:5]), fetch[4])
 
-    async def _async_update_data(self):
-        _LOGGER.debug(
-            "Doing %s email update(s) for: %s", len(self._keys), self._account_name
+        await batch.async_execute()
+        return batch
+
+    async def _async_push_subscription(self, key):
+        mail_folder = key[CONF_O365_MAIL_FOLDER]
+        return (
+            build_push_resource(
+                mail_folder, f"/mailFolders/{mail_folder.folder_id}/messages"
+            ),
+            "created,updated,deleted",
         )
 
-        for key in self._keys:
-            await self._async_email_update(key)
+    async def _async_key_update(self, key, batch, shared=None):
+        async with self._semaphore:
+            # The executor job carries on in the background, but a slow folder
+            # no longer holds up the rest of the cycle
+            async with asyncio.timeout(self._update_timeout):
+                await self._async_email_update(key, batch, shared)
 
-        return self._data
+    @callback
+    def _async_start_delta_sync(self, key):
+        """Start a full delta sync, which runs without the update timeout."""
+        entity_key = key[CONF_ENTITY_KEY]
+        if entity_key in self._delta_syncs:
+            return
+        self._delta_syncs.add(entity_key)
+        self.hass.async_create_background_task(
+            self._async_delta_sync(key), f"O365 mail delta sync {entity_key}"
+        )
+
+    async def _async_delta_sync(self, key):
+        _LOGGER.debug("Doing full delta sync for: %s", key[CONF_NAME])
+        try:
+            await self._throttle.async_call(
+                THROTTLE_OUTLOOK, key[CONF_O365_DELTA].full_sync
+            )
+        except RequestException as err:
+            # Tried again on the key's next update
+            if not is_throttle_error(err):
+                _LOGGER.warning(
+                    "Full delta sync failed for: %s - %s", key[CONF_NAME], err
+                )
+            return
+        finally:
+            self._delta_syncs.discard(key[CONF_ENTITY_KEY])
+        await self._async_refresh_keys([key])
 
-    async def _async_email_update(self, key):
+    async def _async_email_update(self, key, batch, shared):
         """Update code."""
 
         sensor_conf = key[CONF_SENSOR_CONF]
-        download_attachments = sensor_conf.get(CONF_DOWNLOAD_ATTACHMENTS)
+        download_attachments = download_attachment_content(sensor_conf)
         max_items = sensor_conf.get(CONF_MAX_ITEMS, 5)
         mail_folder = key[CONF_O365_MAIL_FOLDER]
         entity_key = key[CONF_ENTITY_KEY]
         query = key[CONF_QUERY]
+        headers = request_headers(sensor_conf)
 
-        data = await self.hass.async_add_executor_job(  # pylint: disable=no-member
-            ft.partial(
-                mail_folder.get_messages,
-                limit=max_items,
-                query=query,
-                download_attachments=download_attachments,
-            )
+        if mail_delta := key.get(CONF_O365_DELTA):
+            if not mail_delta.synced:
+                self._async_start_delta_sync(key)
+                return
+            self._data[entity_key] = {
+                ATTR_DATA: await self._throttle.async_call(
+                    THROTTLE_OUTLOOK,
+                    mail_delta.get_messages,
+                    query,
+                    download_attachments,
+                    headers,
+                )
+            }
+            return
+
+        if shared and entity_key in shared:
+            messages, limit = shared[entity_key]
+            if isinstance(messages, Exception):
+                raise messages
+            matches = filter_messages(sensor_conf, messages)[:max_items]
+            # Too few matches are only the full answer when the folder has no more
+            if len(matches) == max_items or len(messages) < limit:
+                self._data[entity_key] = {ATTR_DATA: matches}
+                return
+            _LOGGER.debug("Shared fetch incomplete for %s - querying", entity_key)
+
+        data = await _async_fetch(
+            self._throttle,
+            batch,
+            key,
+            get_folder_messages,
+            mail_folder,
+            max_items,
+            query,
+            download_attachments,
+            headers,
         )
         self._data[entity_key] = {
-            ATTR_DATA: await self.hass.async_add_executor_job(list, data)
+            ATTR_DATA: await self._throttle.async_call(THROTTLE_OUTLOOK, list, data)
         }
 
 
+def _empty_data(key):
+    """Data for a key with nothing fetched, holding whatever its entity reads."""
+    entity_type = key[CONF_ENTITY_TYPE]
+    if entity_type == TODO_TODO:
+        return {ATTR_TODOS: {}, ATTR_STATE: 0, ATTR_DATA: [], ATTR_ERROR: False}
+    if entity_type == SENSOR_TEAMS_CHAT:
+        return {
+            ATTR_STATE: None,
+            ATTR_FROM_DISPLAY_NAME: None,
+            ATTR_CONTENT: None,
+            ATTR_CHAT_ID: None,
+            ATTR_IMPORTANCE: None,
+            ATTR_SUBJECT: None,
+            ATTR_SUMMARY: None,
+            ATTR_DATA: [],
+        }
+    if entity_type == SENSOR_AUTO_REPLY:
+        return {ATTR_STATE: None, ATTR_AUTOREPLIESSETTINGS: None}
+    return {ATTR_STATE: None, ATTR_DATA: []}
+
+
+def _shared_fetch_size(sensor_conf):
+    """Emails a key needs from a shared fetch, more when it filters them.
+
+    A filtered key falls back to a query of its own when the fetch holds
+    too few matches, so it is given a wider window than its max_items.
+    """
+    max_items = sensor_conf.get(CONF_MAX_ITEMS, 5)
+    if any(
+        sensor_conf.get(conf) is not None
+        for conf in (CONF_HAS_ATTACHMENT, CONF_IMPORTANCE, CONF_IS_UNREAD)
+    ):
+        return max_items * SHARED_FETCH_FACTOR
+    return max_items
+
+
+def _check_key_results(keys, results, account_name):
+    """Log failed key updates, only failing the refresh if every key failed.
+
+    Throttled keys keep their data until the backoff ends, so are not failures.
+    """
+    failed = 0
+    for key, result in zip(keys, results, strict=True):
+        if is_throttle_error(result):
+            _LOGGER.debug(
+                "Update throttled for: %s on account: %s", key[CONF_NAME], account_name
+            )
+        elif isinstance(result, Exception):
+            failed += 1
+            _LOGGER.warning(
+                "Update failed for: %s on account: %s - %s",
+                key[CONF_NAME],
+                account_name,
+                str(result) or type(result).__name__,
+            )
+
+    if keys and failed == len(keys):
+        raise UpdateFailed(f"All updates failed for account: {account_name}")
+
+
+async def _async_fetch(throttle, batch, key, func, *args):
+    """Use the batched result for the key if there is one, else call the API."""
+    resource = THROTTLE_RESOURCES[key[CONF_ENTITY_TYPE]]
+    if batch and key[CONF_ENTITY_KEY] in batch:
+        return throttle.call(resource, batch.result, key[CONF_ENTITY_KEY])
+    return await throttle.async_call(resource, func, *args)
+
+
+def _build_memberlist(members):
+    """Names of the chat members, from their Graph data."""
+    return [
+        member.get("displayName") or member.get("email") or "Name Unknown"
+        for member in members
+    ]
+
+
+def _fingerprint(data):
+    """Cheap summary of a key's data, to tell whether a poll changed anything."""
+    if not data:
+        return None
+    items = data.get(ATTR_DATA)
+    if isinstance(items, list):
+        items = tuple(
+            repr(item)
+            if isinstance(item, dict)
+            else (
+                getattr(item, "object_id", None) or getattr(item, "task_id", None),
+                getattr(item, "modified", None),
+                getattr(item, "is_read", None),
+            )
+            for item in items
+        )
+    return data.get(ATTR_STATE), items
+
+
+def _delta_trackers(keys):
+    return {
+        key[CONF_UNIQUE_ID]: key[CONF_O365_DELTA]
+        for key in keys
+        if CONF_O365_DELTA in key
+    }
+
+
 def _build_entity_id(hass, entity_id_format, name):
     """Build and entity ID."""
     return async_generate_entity_id(
@@ -0,0 +1,478 @@
+"""MS Graph delta query processing."""
+
+import asyncio
+import logging
+import threading
+from http import HTTPStatus
+
+from homeassistant.util import dt as dt_util
+from requests.exceptions import HTTPError
+
+from ..const import GRAPH_DATE_FORMAT, GRAPH_DELTA_PAGE_SIZE, MAIL_DELTA_EPOCH
+from ..utils.filemgmt import (
+    build_config_file_path,
+    build_yaml_filename,
+    load_json_file,
+    write_json_file,
+)
+from .batch import folder_messages_request, get_folder_message
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_COUNT = "count"
+ATTR_DELTA_LINK = "delta_link"
+ATTR_EVENTS = "events"
+ATTR_INDEX = "index"
+ATTR_IS_UNREAD = "is_unread"
+ATTR_LIMIT = "limit"
+ATTR_START = "start"
+ATTR_TASKS = "tasks"
+ATTR_WINDOW = "window"
+
+
+class O365DeltaStore:
+    """Delta state for one account, saved in the o365_storage directory."""
+
+    def __init__(self, hass, config, filename):
+        """Initialise the store."""
+        self._hass = hass
+        self._path = build_config_file_path(
+            hass, build_yaml_filename(config, filename, True)
+        )
+        self._state = None
+        self._lock = asyncio.Lock()
+
+    async def async_get(self, unique_id):
+        """Get the saved state for an entity."""
+        if self._state is None:
+            self._state = await self._hass.async_add_executor_job(
+                load_json_file, self._path
+            )
+        return self._state.get(unique_id)
+
+    async def async_save(self, trackers):
+        """Save the state of any trackers that have changed."""
+        async with self._lock:
+            changed = False
+            for unique_id, tracker in trackers.items():
+                if state := tracker.pop_changed_state():
+                    self._state[unique_id] = state
+                    changed = True
+            if changed:
+                await self._hass.async_add_executor_job(
+                    write_json_file, self._path, self._state
+                )
+
+
+class O365Delta:
+    """Follow a MS Graph delta query, keeping the delta link between polls."""
+
+    def __init__(self, parent, state=None):
+        """Initialise the delta tracker."""
+        state = state or {}
+        self._parent = parent
+        self._delta_link = state.get(ATTR_DELTA_LINK)
+        self._changed_state = None
+        # A timed out poll keeps running in the executor, so serialise syncs
+        self._lock = threading.Lock()
+
+    def pop_changed_state(self):
+        """Return the state to persist if it changed since last asked, else None."""
+        changed_state, self._changed_state = self._changed_state, None
+        return changed_state
+
+    def _state(self):
+        """State needed to resume the delta query after a restart."""
+        return {ATTR_DELTA_LINK: self._delta_link}
+
+    def _delta_url(self):
+        """Url and params for a full sync."""
+        raise NotImplementedError
+
+    def _reset(self):
+        """Drop the local copy ahead of a full sync."""
+        raise NotImplementedError
+
+    def _apply(self, item):
+        """Apply one changed or removed item from the delta response."""
+        raise NotImplementedError
+
+    def sync(self):
+        """Fetch and apply all changes since the last poll, runs in the executor."""
+        try:
+            return self._sync()
+        except HTTPError as err:
+            if not self._delta_link or not _is_sync_reset(err):
+                raise
+            _LOGGER.info("Delta link expired, doing full sync")
+            self._delta_link = None
+            return self._sync()
+
+    def _sync(self):
+        full_sync = not self._delta_link
+        if full_sync:
+            self._reset()
+            url, params = self._delta_url()
+        else:
+            url, params = self._delta_link, None
+
+        changed = 0
+        headers = {"Prefer": f"odata.maxpagesize={GRAPH_DELTA_PAGE_SIZE}"}
+        while url:
+            response = self._parent.con.get(url, params=params, headers=headers)
+            data = response.json()
+            for item in data.get("value", []):
+                self._apply(item)
+                changed += 1
+            url = data.get("@odata.nextLink")
+            params = None
+            if delta_link := data.get("@odata.deltaLink"):
+                self._delta_link = delta_link
+
+        # An unchanged folder can keep using the saved link, so only save on change
+        if changed or full_sync:
+            self._changed_state = self._state()
+        return changed
+
+
+class O365MailDelta(O365Delta):
+    """Track the newest messages in a mail folder with messages/delta.
+
+    The delta only covers messages received since the oldest of the newest
+    limit messages matching the sensor when it was set up, so a first sync reads
+    about limit messages rather than the whole folder. Only the id, received
+    date and read flag are held, for the messages back to the oldest shown, and
+    full messages are fetched for those shown. When fewer messages than were in
+    the window match, say after some are deleted or read, the window is set up
+    again by a full sync. Older messages marked unread are only seen then.
+    """
+
+    def __init__(self, mail_folder, limit, is_unread, state=None):
+        """Initialise the mail delta tracker."""
+        self._limit = limit
+        self._is_unread = is_unread
+        window = (state or {}).get(ATTR_WINDOW) or {}
+        if window.get(ATTR_LIMIT) != limit or window.get(ATTR_IS_UNREAD) != is_unread:
+            state = None
+        super().__init__(mail_folder, state)
+        state = state or {}
+        self._window = window if self._delta_link else {}
+        self._index = state.get(ATTR_INDEX, {}) if self._delta_link else {}
+        self._messages = {}
+        self._changed = set()
+
+    @property
+    def synced(self):
+        """Whether a full sync has been done, else get_messages has nothing to give."""
+        return bool(self._delta_link)
+
+    def _state(self):
+        return super()._state() | {
+            ATTR_WINDOW: self._window,
+            ATTR_INDEX: dict(self._index),
+        }
+
+    def _delta_url(self):
+        mail_folder = self._parent
+        url = mail_folder.build_url(
+            f"/mailFolders/{mail_folder.folder_id}/messages/delta"
+        )
+        return url, {
+            "$select": "receivedDateTime,isRead",
+            "$filter": f"receivedDateTime ge {self._window[ATTR_START]}",
+        }
+
+    def _reset(self):
+        self._index = {}
+        self._messages = {}
+
+    def _apply(self, item):
+        message_id = item["id"]
+        if "@removed" in item:
+            self._index.pop(message_id, None)
+            self._messages.pop(message_id, None)
+            return
+        current = self._index.get(message_id, [None, None])
+        self._index[message_id] = [
+            item.get("receivedDateTime", current[0]),
+            item.get("isRead", current[1]),
+        ]
+        self._changed.add(message_id)
+
+    def full_sync(self):
+        """Set up the window and read the messages in it, runs in the executor.
+
+        This can take a while on a large folder, so is left to run in the
+        background rather than as part of an update.
+        """
+        with self._lock:
+            self._window = self._build_window()
+            self._delta_link = None
+            self._sync()
+
+    def _build_window(self):
+        """Start the window at the oldest of the newest messages matching the sensor."""
+        mail_folder = self._parent
+        params = {
+            "$select": "receivedDateTime",
+            "$orderby": "receivedDateTime desc",
+            "$top": min(self._limit, mail_folder.protocol.max_top_value),
+        }
+        if self._is_unread is not None:
+            # MS Graph needs the $orderby property to be filtered on first
+            params["$filter"] = (
+                f"receivedDateTime ge {MAIL_DELTA_EPOCH} "
+                f"and isRead eq {str(not self._is_unread).lower()}"
+            )
+        response = mail_folder.con.get(
+            mail_folder.build_url(f"/mailFolders/{mail_folder.folder_id}/messages"),
+            params=params,
+        )
+        received = [item["receivedDateTime"] for item in response.json()["value"]]
+        start = (
+            received[-1] if received else dt_util.utcnow().strftime(GRAPH_DATE_FORMAT)
+        )
+        return {
+            ATTR_START: start,
+            ATTR_COUNT: len(received),
+            ATTR_LIMIT: self._limit,
+            ATTR_IS_UNREAD: self._is_unread,
+        }
+
+    def get_messages(self, query, download_attachments, headers):
+        """Apply changes then return the newest messages matching the sensor.
+
+        Runs in the executor. Until the first full sync has been done there are
+        no messages to return.
+        """
+        with self._lock:
+            if not self._delta_link:
+                return list(self._messages.values())
+            return self._get_messages(query, download_attachments, headers)
+
+    def _get_messages(self, query, download_attachments, headers):
+        self._changed = set()
+        try:
+            self._sync()
+        except HTTPError as err:
+            if not _is_sync_reset(err):
+                raise
+            _LOGGER.info("Delta link expired, doing full sync")
+            self._delta_link = None
+            return list(self._messages.values())
+
+        message_ids = sorted(
+            (
+                message_id
+                for message_id, (_, is_read) in self._index.items()
+                if self._is_unread is None or is_read != self._is_unread
+            ),
+            key=lambda message_id: self._index[message_id][0] or "",
+            reverse=True,
+        )[: self._limit]
+        if len(message_ids) < min(self._limit, self._window[ATTR_COUNT]):
+            # Messages have gone from the window, so older ones may now be shown
+            _LOGGER.debug("Delta window short of messages, doing full sync")
+            self._delta_link = None
+        if self._trim_index(message_ids) or self._changed_state is not None:
+            self._changed_state = self._state()
+
+        missing = [
+            message_id
+            for message_id in message_ids
+            if message_id not in self._messages or message_id in self._changed
+        ]
+        fetched = self._fetch_messages(missing, query, download_attachments, headers)
+        messages = {}
+        for message_id in message_ids:
+            if message := fetched.get(message_id, self._messages.get(message_id)):
+                messages[message_id] = message
+        self._messages = messages
+
+        return list(messages.values())
+
+    def _trim_index(self, message_ids):
+        """Drop the messages older than those shown, as they are not needed."""
+        if len(message_ids) < self._limit:
+            return False
+        oldest = self._index[message_ids[-1]][0] or ""
+        trimmed = {
+            message_id: entry
+            for message_id, entry in self._index.items()
+            if (entry[0] or "") >= oldest
+        }
+        if len(trimmed) == len(self._index):
+            return False
+        self._index = trimmed
+        return True
+
+    def _fetch_messages(self, message_ids, query, download_attachments, headers):
+        """Fetch messages, in one request when there are several such as after a restart."""
+        mail_folder = self._parent
+        if len(message_ids) == 1:
+            message = get_folder_message(
+                mail_folder, message_ids[0], query, download_attachments, headers
+            )
+            return {message_ids[0]: message} if message else {}
+        if not message_ids:
+            return {}
+
+        oldest = min(self._index[message_id][0] or "" for message_id in message_ids)
+        limit = sum(1 for entry in self._index.values() if (entry[0] or "") >= oldest)
+        url, params, parser = folder_messages_request(
+            mail_folder, limit, query, download_attachments, headers
+        )
+        params |= {
+            "$filter": f"receivedDateTime ge {oldest}",
+            "$orderby": "receivedDateTime desc",
+        }
+        response = mail_folder.con.get(url, params=params, headers=dict(headers))
+        wanted = set(message_ids)
+        fetched = {}
+        if response:
+            for message in parser(response.json()):
+                if message.object_id in wanted:
+                    fetched[message.object_id] = message
+        # Any the list missed, such as one received as it was read
+        for message_id in wanted - fetched.keys():
+            if message := get_folder_message(
+                mail_folder, message_id, query, download_attachments, headers
+            ):
+                fetched[message_id] = message
+        return fetched
+
+
+def _is_sync_reset(err):
+    """MS Graph returns 410 Gone when a delta link can no longer be used."""
+    return err.response is not None and err.response.status_code == HTTPStatus.GONE
+
+
+class O365TodoDelta(O365Delta):
+    """Track a To Do list with tasks/delta, keeping every task in the list."""
+
+    def __init__(self, task_folder, state=None):
+        """Initialise the todo delta tracker."""
+        super().__init__(task_folder, state)
+        state = state or {}
+        self._raw_tasks = state.get(ATTR_TASKS, {}) if self._delta_link else {}
+        self._tasks = {
+            task_id: self._build_task(raw_task)
+            for task_id, raw_task in self._raw_tasks.items()
+        }
+        self._changed = set()
+
+    def _state(self):
+        return super()._state() | {ATTR_TASKS: dict(self._raw_tasks)}
+
+    def _delta_url(self):
+        task_folder = self._parent
+        url = task_folder.build_url(f"/todo/lists/{task_folder.folder_id}/tasks/delta")
+        return url, None
+
+    def _reset(self):
+        self._raw_tasks = {}
+        self._tasks = {}
+
+    def _apply(self, item):
+        task_id = item["id"]
+        self._changed.add(task_id)
+        if "@removed" in item:
+            self._raw_tasks.pop(task_id, None)
+            self._tasks.pop(task_id, None)
+            return
+        self._raw_tasks[task_id] = item
+        self._tasks[task_id] = self._build_task(item)
+
+    def _build_task(self, raw_task):
+        task_folder = self._parent
+        return task_folder.task_constructor(
+            parent=task_folder,
+            **{task_folder._cloud_data_key: raw_task},  # pylint: disable=protected-access
+        )
+
+    def get_tasks(self):
+        """Sync then return all tasks and the ids changed, runs in the executor.
+
+        The changed ids are None after a full sync, as every task is new.
+        """
+        with self._lock:
+            self._changed = set()
+            full_sync = not self._delta_link
+            self.sync()
+            changed = None if full_sync else self._changed
+            return list(self._tasks.values()), changed
+
+
+class O365CalendarDelta(O365Delta):
+    """Track a fixed window of a calendar with calendarView/delta."""
+
+    def __init__(self, calendar, start, end, state=None):
+        """Initialise the calendar delta tracker."""
+        self.start = start
+        self.end = end
+        self._window = f"{start.isoformat()}/{end.isoformat()}"
+        if state and state.get(ATTR_WINDOW) != self._window:
+            state = None
+        super().__init__(calendar, state)
+        state = state or {}
+        self._raw_events = state.get(ATTR_EVENTS, {}) if self._delta_link else {}
+        self._events = {
+            event_id: self._build_event(raw_event)
+            for event_id, raw_event in self._raw_events.items()
+        }
+        self.synced = False
+
+    def covers(self, start, end):
+        """Check whether the period is held in the window."""
+        return self.start <= start and end <= self.end
+
+    def _state(self):
+        return super()._state() | {
+            ATTR_WINDOW: self._window,
+            ATTR_EVENTS: dict(self._raw_events),
+        }
+
+    def _delta_url(self):
+        calendar = self._parent
+        url = calendar.build_url(
+            f"/calendars/{calendar.calendar_id}/calendarView/delta"
+        )
+        params = {
+            "startDateTime": self.start.isoformat(),
+            "endDateTime": self.end.isoformat(),
+        }
+        return url, params
+
+    def _reset(self):
+        self._raw_events = {}
+        self._events = {}
+
+    def _apply(self, item):
+        event_id = item["id"]
+        if "@removed" in item:
+            self._raw_events.pop(event_id, None)
+            self._events.pop(event_id, None)
+            return
+        self._raw_events[event_id] = item
+        self._events[event_id] = self._build_event(item)
+
+    def _build_event(self, raw_event):
+        calendar = self._parent
+        return calendar.event_constructor(
+            parent=calendar,
+            **{calendar._cloud_data_key: raw_event},  # pylint: disable=protected-access
+        )
+
+    def sync_events(self):
+        """Sync the window, runs in the executor."""
+        with self._lock:
+            self.sync()
+            self.synced = True
+
+    def get_events(self, start, end):
+        """Events in the window which overlap the period."""
+        return [
+            event
+            for event in list(self._events.values())
+            if event.end > start and event.start < end
+        ]
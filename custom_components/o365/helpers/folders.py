@@ -0,0 +1,171 @@
+"""Mail folder path resolution."""
+
+import asyncio
+import functools as ft
+import logging
+from http import HTTPStatus
+
+from requests.exceptions import HTTPError
+
+from ..const import JSON_MAIL_FOLDERS_FILENAME, THROTTLE_OUTLOOK
+from ..utils.filemgmt import (
+    build_config_file_path,
+    build_yaml_filename,
+    load_json_file,
+    write_json_file,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class O365MailboxRegistry:
+    """Mailbox and mail folder objects for one account, shared by its sensors.
+
+    Each distinct folder is resolved once, however many sensors use it.
+    """
+
+    def __init__(self, hass, config, account, throttle):
+        """Initialise the registry."""
+        self._hass = hass
+        self._account = account
+        self._throttle = throttle
+        self._folder_store = O365FolderStore(hass, config, JSON_MAIL_FOLDERS_FILENAME)
+        self._mailbox = None
+        self._inbox = None
+        self._folders = {}
+        self._lock = asyncio.Lock()
+
+    async def async_get_mailbox(self):
+        """Get the account's mailbox."""
+        async with self._lock:
+            return await self._async_get_mailbox()
+
+    async def async_get_folder(self, mail_folder_conf, sensor_type):
+        """Get the configured folder, the inbox if none is configured."""
+        async with self._lock:
+            mailbox = await self._async_get_mailbox()
+            if not mail_folder_conf:
+                if self._inbox is None:
+                    self._inbox = await self._hass.async_add_executor_job(
+                        mailbox.inbox_folder
+                    )
+                return self._inbox
+
+            folder_path = f"{mailbox.main_resource}/{mail_folder_conf}"
+            if folder_path not in self._folders:
+                mail_folder = await self._async_get_saved_mail_folder(
+                    folder_path, mailbox
+                ) or await self._async_resolve_mail_folder(
+                    folder_path, mail_folder_conf, mailbox, sensor_type
+                )
+                if not mail_folder:
+                    return None
+                self._folders[folder_path] = mail_folder
+            return self._folders[folder_path]
+
+    async def _async_get_mailbox(self):
+        if self._mailbox is None:
+            self._mailbox = await self._hass.async_add_executor_job(
+                self._account.mailbox
+            )
+        return self._mailbox
+
+    async def _async_resolve_mail_folder(
+        self, folder_path, mail_folder_conf, mailbox, sensor_type
+    ):
+        mail_folder = mailbox
+        _LOGGER.debug("Get folder %s - start", mail_folder_conf)
+
+        for folder in mail_folder_conf.split("/"):
+            mail_folder = await self._throttle.async_call(
+                THROTTLE_OUTLOOK,
+                ft.partial(
+                    mail_folder.get_folder,
+                    folder_name=folder,
+                ),
+            )
+            _LOGGER.debug("Get folder %s - process - %s", mail_folder_conf, mail_folder)
+            if not mail_folder:
+                _LOGGER.error(
+                    "Folder - %s - not found from %s config entry - %s - entity not created",
+                    folder,
+                    sensor_type,
+                    mail_folder_conf,
+                )
+                return None
+
+        _LOGGER.debug("Get folder %s - finish ", mail_folder_conf)
+        await self._folder_store.async_set(folder_path, mail_folder.folder_id)
+        return mail_folder
+
+    async def _async_get_saved_mail_folder(self, folder_path, mailbox):
+        """Get the folder by the id saved for its path, if it still exists."""
+        if not (folder_id := await self._folder_store.async_get(folder_path)):
+            return None
+        try:
+            return await self._throttle.async_call(
+                THROTTLE_OUTLOOK, ft.partial(mailbox.get_folder, folder_id=folder_id)
+            )
+        except HTTPError as err:
+            if not _is_not_found(err):
+                raise
+        _LOGGER.debug("Saved folder id for %s not found - resolving path", folder_path)
+        await self._folder_store.async_remove(folder_path)
+        return None
+
+
+class O365FolderStore:
+    """Resolved mail folder ids for one account, saved in the o365_storage directory.
+
+    Resolving a folder path takes a call per path segment, so the id found is
+    kept and the path is only walked again when the id is no longer valid.
+    """
+
+    def __init__(self, hass, config, filename):
+        """Initialise the store."""
+        self._hass = hass
+        self._path = build_config_file_path(
+            hass, build_yaml_filename(config, filename, True)
+        )
+        self._folder_ids = None
+        self._lock = asyncio.Lock()
+
+    async def async_get(self, folder_path):
+        """Get the saved folder id for a path."""
+        async with self._lock:
+            await self._async_load()
+            return self._folder_ids.get(folder_path)
+
+    async def async_set(self, folder_path, folder_id):
+        """Save the folder id for a path, if it changed."""
+        await self._async_update(folder_path, folder_id)
+
+    async def async_remove(self, folder_path):
+        """Forget the folder id for a path."""
+        await self._async_update(folder_path, None)
+
+    async def _async_load(self):
+        if self._folder_ids is None:
+            self._folder_ids = await self._hass.async_add_executor_job(
+                load_json_file, self._path
+            )
+
+    async def _async_update(self, folder_path, folder_id):
+        async with self._lock:
+            await self._async_load()
+            if self._folder_ids.get(folder_path) == folder_id:
+                return
+            if folder_id:
+                self._folder_ids[folder_path] = folder_id
+            else:
+                self._folder_ids.pop(folder_path, None)
+            await self._hass.async_add_executor_job(
+                write_json_file, self._path, self._folder_ids
+            )
+
+
+def _is_not_found(err):
+    """MS Graph returns 404 Not Found when a folder id no longer exists."""
+    return (
+        err.response is not None and err.response.status_code == HTTPStatus.NOT_FOUND
+    )
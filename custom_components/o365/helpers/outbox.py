@@ -0,0 +1,308 @@
+"""Outbound mail queue."""
+
+import asyncio
+import contextlib
+import logging
+import os
+import shutil
+import time
+import uuid
+from collections import deque
+
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+from O365.message import Message
+from requests.exceptions import HTTPError, RequestException
+
+from ..const import (
+    CONF_ACCOUNT,
+    CONF_RATE_LIMITER,
+    CONF_THROTTLE,
+    OUTBOX_BATCH_MESSAGE_SIZE,
+    OUTBOX_DIRECTORY,
+    OUTBOX_LATENCY_SAMPLES,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_MAX_CONCURRENT_SENDS,
+    RATE_LIMIT_INTERACTIVE,
+    THROTTLE_BACKOFF_BASE,
+    THROTTLE_BACKOFF_MAX,
+    THROTTLE_OUTLOOK,
+)
+from ..utils.filemgmt import (
+    build_config_file_path,
+    build_yaml_filename,
+    load_json_file,
+    write_json_file,
+)
+from .batch import O365BatchRequest
+from .throttle import O365ThrottledError
+from .upload import send_with_upload_sessions
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_ATTEMPTS = "attempts"
+ATTR_MESSAGE = "message"
+ATTR_NEXT_ATTEMPT = "next_attempt"
+ATTR_QUEUED = "queued"
+ATTR_RESOURCE_URL = "resource_url"
+ATTR_SIZE = "size"
+ATTR_TEMP_DIRS = "temp_dirs"
+ATTR_UPLOADS = "uploads"
+
+# pylint: disable-next=protected-access
+_SEND_MAIL_ENDPOINT = Message._endpoints.get("send_mail")
+
+
+class O365Outbox:
+    """Mail waiting to be sent for one account, saved in the o365_storage directory.
+
+    Each message is saved to a file of its own when it is queued, so it
+    survives a restart, and the file is removed once the message is sent. A
+    background worker sends the messages, packing small ones into $batch
+    requests, and retries failed sends after an increasing delay.
+    """
+
+    def __init__(self, hass, config):
+        """Initialise the outbox."""
+        self._hass = hass
+        self._account = config[CONF_ACCOUNT]
+        self._rate_limiter = config[CONF_RATE_LIMITER]
+        self._throttle = config[CONF_THROTTLE]
+        self.directory = build_config_file_path(
+            hass, build_yaml_filename(config, OUTBOX_DIRECTORY, True)
+        )
+        # Message id to its MS Graph data, where to send it and its retries
+        self._entries = {}
+        self._semaphore = asyncio.Semaphore(OUTBOX_MAX_CONCURRENT_SENDS)
+        self._latencies = deque(maxlen=OUTBOX_LATENCY_SAMPLES)
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    @property
+    def queue_depth(self):
+        """Messages waiting to be sent."""
+        return len(self._entries)
+
+    @property
+    def latency(self):
+        """Average seconds recent messages took from being queued to being sent."""
+        if not self._latencies:
+            return 0
+        return sum(self._latencies) / len(self._latencies)
+
+    async def async_start(self):
+        """Load the messages left unsent by a previous run and start sending."""
+        self._entries = await self._hass.async_add_executor_job(self._load)
+        if self._entries:
+            _LOGGER.debug("%s unsent message(s) loaded", len(self._entries))
+        self._task = self._hass.async_create_background_task(
+            self._async_run(), f"O365 outbox {self.directory}"
+        )
+
+    @callback
+    def async_stop(self):
+        """Stop sending, leaving unsent messages saved for the next start."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def async_enqueue(self, message, file_paths=None, temp_dirs=None):
+        """Queue an O365 message, returning once it is saved.
+
+        The files are uploaded to the message when it is sent, and the
+        temporary directories removed once it is sent or dropped.
+        """
+        entry = {
+            ATTR_QUEUED: time.time(),
+            ATTR_ATTEMPTS: 0,
+            ATTR_NEXT_ATTEMPT: 0,
+            ATTR_RESOURCE_URL: message.build_url(""),
+            ATTR_MESSAGE: message.to_api_data(),
+            ATTR_UPLOADS: list(file_paths or []),
+            ATTR_TEMP_DIRS: list(temp_dirs or []),
+        }
+        entry_id = uuid.uuid4().hex
+        await self._hass.async_add_executor_job(self._save, entry_id, entry)
+        self._entries[entry_id] = entry
+        self._wakeup.set()
+
+    async def _async_run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            due = [
+                entry_id
+                for entry_id, entry in self._entries.items()
+                if entry[ATTR_NEXT_ATTEMPT] <= now
+            ]
+            if due and not self._throttle.throttled_until(THROTTLE_OUTLOOK):
+                await self._async_send(due)
+                continue
+            await self._async_wait(now)
+
+    async def _async_wait(self, now):
+        """Wait for a message to be queued, a retry to fall due or throttling to end."""
+        delay = None
+        if until := self._throttle.throttled_until(THROTTLE_OUTLOOK):
+            delay = (until - dt_util.utcnow()).total_seconds()
+        elif self._entries:
+            delay = min(entry[ATTR_NEXT_ATTEMPT] for entry in self._entries.values())
+            delay -= now
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(delay):
+                await self._wakeup.wait()
+
+    async def _async_send(self, entry_ids):
+        batched = [
+            entry_id
+            for entry_id in entry_ids
+            if not self._entries[entry_id][ATTR_UPLOADS]
+            and self._entries[entry_id][ATTR_SIZE] <= OUTBOX_BATCH_MESSAGE_SIZE
+        ]
+        # A batch of one is no quicker than sending the message itself
+        if len(batched) < 2:
+            batched = []
+        await asyncio.gather(
+            self._async_send_batch(batched),
+            *(
+                self._async_send_one(entry_id)
+                for entry_id in entry_ids
+                if entry_id not in batched
+            ),
+        )
+
+    async def _async_send_batch(self, entry_ids):
+        if not entry_ids:
+            return
+        batch = O365BatchRequest(
+            self._hass,
+            self._account,
+            self._semaphore,
+            self._rate_limiter,
+            priority=RATE_LIMIT_INTERACTIVE,
+        )
+        for entry_id in entry_ids:
+            entry = self._entries[entry_id]
+            batch.add(
+                entry_id,
+                f"{entry[ATTR_RESOURCE_URL]}{_SEND_MAIL_ENDPOINT}",
+                None,
+                bool,
+                body={"message": entry[ATTR_MESSAGE]},
+            )
+        await batch.async_execute()
+        for entry_id in entry_ids:
+            await self._async_sent(entry_id, self._batch_error(batch, entry_id))
+
+    def _batch_error(self, batch, entry_id):
+        """The error sending a batched message, None if it was sent."""
+        try:
+            batch.result(entry_id)
+        except (RequestException, TimeoutError):
+            pass
+        else:
+            return None
+        # Going through the throttle records any throttling of the mailbox
+        try:
+            self._throttle.call(THROTTLE_OUTLOOK, batch.result, entry_id)
+        except (RequestException, TimeoutError) as err:
+            return err
+        return None
+
+    async def _async_send_one(self, entry_id):
+        error = None
+        async with self._semaphore:
+            try:
+                if not await self._throttle.async_call(
+                    THROTTLE_OUTLOOK,
+                    self._send,
+                    self._entries[entry_id],
+                    priority=RATE_LIMIT_INTERACTIVE,
+                ):
+                    error = RequestException("MS Graph did not accept the message")
+            except (OSError, RequestException) as err:
+                error = err
+        await self._async_sent(entry_id, error)
+
+    def _send(self, entry):
+        """Send one message, runs in the executor."""
+        con = self._account.con
+        if entry[ATTR_UPLOADS]:
+            return send_with_upload_sessions(
+                con, entry[ATTR_RESOURCE_URL], entry[ATTR_MESSAGE], entry[ATTR_UPLOADS]
+            )
+        return bool(
+            con.post(
+                f"{entry[ATTR_RESOURCE_URL]}{_SEND_MAIL_ENDPOINT}",
+                data={"message": entry[ATTR_MESSAGE]},
+            )
+        )
+
+    async def _async_sent(self, entry_id, error):
+        """Remove a sent message, or schedule its retry."""
+        entry = self._entries[entry_id]
+        subject = entry[ATTR_MESSAGE].get("subject")
+        if error is None:
+            self._latencies.append(time.time() - entry[ATTR_QUEUED])
+            del self._entries[entry_id]
+            await self._hass.async_add_executor_job(self._remove, entry_id, entry)
+            return
+        # Not attempted, the message is sent once the mailbox stops throttling
+        if isinstance(error, O365ThrottledError):
+            return
+
+        entry[ATTR_ATTEMPTS] += 1
+        if not _is_transient(error) or entry[ATTR_ATTEMPTS] >= OUTBOX_MAX_ATTEMPTS:
+            _LOGGER.error(
+                "Message '%s' not sent after %s attempt(s), removed from outbox - %s",
+                subject,
+                entry[ATTR_ATTEMPTS],
+                error,
+            )
+            del self._entries[entry_id]
+            await self._hass.async_add_executor_job(self._remove, entry_id, entry)
+            return
+
+        delay = min(
+            THROTTLE_BACKOFF_BASE * 2 ** (entry[ATTR_ATTEMPTS] - 1),
+            THROTTLE_BACKOFF_MAX,
+        )
+        entry[ATTR_NEXT_ATTEMPT] = time.time() + delay
+        _LOGGER.warning(
+            "Message '%s' not sent, retrying in %s seconds - %s", subject, delay, error
+        )
+        await self._hass.async_add_executor_job(self._save, entry_id, entry)
+
+    def _path(self, entry_id):
+        return os.path.join(self.directory, f"{entry_id}.json")
+
+    def _load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        entries = {}
+        for filename in os.listdir(self.directory):
+            entry_id, extension = os.path.splitext(filename)
+            if extension != ".json":
+                continue
+            if entry := load_json_file(self._path(entry_id)):
+                entry[ATTR_SIZE] = os.path.getsize(self._path(entry_id))
+                entries[entry_id] = entry
+        return entries
+
+    def _save(self, entry_id, entry):
+        path = self._path(entry_id)
+        write_json_file(path, entry)
+        entry[ATTR_SIZE] = os.path.getsize(path)
+
+    def _remove(self, entry_id, entry):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._path(entry_id))
+        for temp_dir in entry[ATTR_TEMP_DIRS]:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _is_transient(err):
+    """Connection errors, timeouts, throttling and server errors are worth retrying."""
+    if isinstance(err, HTTPError) and err.response is not None:
+        status = err.response.status_code
+        return status >= 500 or status in (408, 429)
+    return isinstance(err, (RequestException, TimeoutError))
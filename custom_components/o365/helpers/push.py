@@ -0,0 +1,259 @@
+"""MS Graph change notification subscriptions."""
+
+import logging
+import secrets
+from datetime import timedelta
+
+from aiohttp import web_response
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.network import NoURLAvailableError, get_url
+from homeassistant.helpers.start import async_at_started
+from homeassistant.util import dt as dt_util
+from requests.exceptions import RequestException
+
+from ..const import (
+    CONF_ACCOUNT,
+    CONF_ACCOUNT_NAME,
+    CONF_THROTTLE,
+    PUSH_CALLBACK_NAME,
+    PUSH_CALLBACK_PATH,
+    PUSH_RENEW_INTERVAL,
+    PUSH_SUBSCRIPTION_MINUTES,
+    PUSH_VIEWS,
+    THROTTLE_SUBSCRIPTIONS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_CHANGE_TYPE = "change_type"
+ATTR_ON_NOTIFY = "on_notify"
+ATTR_ON_STATUS = "on_status"
+ATTR_RESOURCE = "resource"
+ATTR_SUBSCRIPTION_ID = "subscription_id"
+
+
+class O365PushManager:
+    """Keep MS Graph subscriptions alive for one account and route notifications.
+
+    Each registration gets an on_notify callback for changes and an on_status
+    callback, called with False when the subscription lapses so the owner can
+    go back to polling, and True when it is active again.
+    """
+
+    def __init__(self, hass, config):
+        """Initialise the push manager."""
+        self._hass = hass
+        self._account = config[CONF_ACCOUNT]
+        self._account_name = config[CONF_ACCOUNT_NAME]
+        self._throttle = config[CONF_THROTTLE]
+        self._client_state = secrets.token_urlsafe(32)
+        self._registrations = []
+        self._notification_url = None
+        self._started = False
+        self._unsubs = []
+
+    @property
+    def _subscriptions_url(self):
+        return f"{self._account.protocol.service_url}subscriptions"
+
+    def async_setup(self):
+        """Register the webhook and start subscribing once HA has started."""
+        try:
+            base_url = get_url(self._hass, allow_internal=False, require_ssl=True)
+        except NoURLAvailableError:
+            _LOGGER.warning(
+                "Push notifications need an external https url for Home Assistant, "
+                + "using polling for account: %s",
+                self._account_name,
+            )
+            return False
+
+        callback_path = PUSH_CALLBACK_PATH.format(self._account_name)
+        self._notification_url = f"{base_url}{callback_path}"
+        # Views cannot be removed, so a re-setup points the existing view here
+        views = self._hass.data.setdefault(PUSH_VIEWS, {})
+        if view := views.get(self._account_name):
+            view.push_manager = self
+        else:
+            views[self._account_name] = O365PushView(self, self._account_name)
+            self._hass.http.register_view(views[self._account_name])
+
+        self._unsubs.append(async_at_started(self._hass, self._async_started))
+        return True
+
+    async def async_stop(self):
+        """Stop renewing and delete the subscriptions, such as on a re-setup."""
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+        self._started = False
+        await self._async_delete_subscriptions()
+
+    @callback
+    def async_register(self, resource, change_type, on_notify, on_status):
+        """Register a resource to subscribe to."""
+        registration = {
+            ATTR_RESOURCE: resource,
+            ATTR_CHANGE_TYPE: change_type,
+            ATTR_ON_NOTIFY: on_notify,
+            ATTR_ON_STATUS: on_status,
+            ATTR_SUBSCRIPTION_ID: None,
+        }
+        self._registrations.append(registration)
+        if self._started:
+            self._hass.async_create_task(self._async_subscribe(registration))
+
+    async def _async_started(self, hass):
+        self._started = True
+        for registration in self._registrations:
+            await self._async_subscribe(registration)
+        self._unsubs = [
+            async_track_time_interval(
+                hass, self._async_renew, timedelta(minutes=PUSH_RENEW_INTERVAL)
+            ),
+            hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_STOP, self._async_homeassistant_stop
+            ),
+        ]
+
+    async def _async_subscribe(self, registration):
+        data = {
+            "changeType": registration[ATTR_CHANGE_TYPE],
+            "notificationUrl": self._notification_url,
+            "lifecycleNotificationUrl": self._notification_url,
+            "resource": registration[ATTR_RESOURCE],
+            "expirationDateTime": _expiration(),
+            "clientState": self._client_state,
+        }
+        try:
+            response = await self._throttle.async_call(
+                THROTTLE_SUBSCRIPTIONS,
+                self._account.con.post,
+                self._subscriptions_url,
+                data,
+            )
+        except RequestException as err:
+            _LOGGER.warning(
+                "Subscription failed for: %s, using polling - %s",
+                registration[ATTR_RESOURCE],
+                err,
+            )
+            response = None
+
+        subscription_id = response.json()["id"] if response else None
+        if subscription_id:
+            _LOGGER.debug(
+                "Subscribed to: %s, subscription id: %s",
+                registration[ATTR_RESOURCE],
+                subscription_id,
+            )
+        active = bool(subscription_id)
+        if active != bool(registration[ATTR_SUBSCRIPTION_ID]) or not active:
+            registration[ATTR_ON_STATUS](active)
+        registration[ATTR_SUBSCRIPTION_ID] = subscription_id
+
+    async def _async_renew(self, _now=None):
+        for registration in self._registrations:
+            await self._async_renew_registration(registration)
+
+    async def _async_renew_registration(self, registration):
+        if subscription_id := registration[ATTR_SUBSCRIPTION_ID]:
+            try:
+                if await self._throttle.async_call(
+                    THROTTLE_SUBSCRIPTIONS,
+                    self._account.con.patch,
+                    f"{self._subscriptions_url}/{subscription_id}",
+                    {"expirationDateTime": _expiration()},
+                ):
+                    return
+            except RequestException as err:
+                _LOGGER.debug(
+                    "Renewal failed for: %s - %s", registration[ATTR_RESOURCE], err
+                )
+        await self._async_subscribe(registration)
+
+    async def _async_homeassistant_stop(self, _event):
+        # The stop listener has fired, so is no longer there to remove
+        self._unsubs.pop()
+        await self.async_stop()
+
+    async def _async_delete_subscriptions(self):
+        for registration in self._registrations:
+            if subscription_id := registration[ATTR_SUBSCRIPTION_ID]:
+                registration[ATTR_SUBSCRIPTION_ID] = None
+                try:
+                    await self._throttle.async_call(
+                        THROTTLE_SUBSCRIPTIONS,
+                        self._account.con.delete,
+                        f"{self._subscriptions_url}/{subscription_id}",
+                    )
+                except RequestException:
+                    _LOGGER.debug("Failed to remove subscription: %s", subscription_id)
+
+    @callback
+    def async_handle_notifications(self, notifications):
+        """Route notifications to their registrations."""
+        for notification in notifications:
+            if notification.get("clientState") != self._client_state:
+                _LOGGER.warning("Notification with invalid client state ignored")
+                continue
+            subscription_id = notification.get("subscriptionId")
+            registration = next(
+                (
+                    registration
+                    for registration in self._registrations
+                    if registration[ATTR_SUBSCRIPTION_ID] == subscription_id
+                ),
+                None,
+            )
+            if not registration:
+                continue
+
+            lifecycle_event = notification.get("lifecycleEvent")
+            if lifecycle_event in ("subscriptionRemoved", "reauthorizationRequired"):
+                self._hass.async_create_task(
+                    self._async_renew_registration(registration)
+                )
+            if lifecycle_event != "reauthorizationRequired":
+                # Changes or a missed notification, either way refresh
+                registration[ATTR_ON_NOTIFY]()
+
+
+class O365PushView(HomeAssistantView):
+    """O365 change notification webhook."""
+
+    requires_auth = False
+
+    def __init__(self, push_manager, account_name):
+        """Initialise the view."""
+        self.push_manager = push_manager
+        self.url = PUSH_CALLBACK_PATH.format(account_name)
+        self.name = PUSH_CALLBACK_NAME.format(account_name)
+
+    async def post(self, request):
+        """Receive notifications, or echo the token to validate the subscription."""
+        if validation_token := request.query.get("validationToken"):
+            return web_response.Response(
+                headers={"content-type": "text/plain"}, text=validation_token
+            )
+
+        try:
+            data = await request.json()
+        except ValueError:
+            return web_response.Response(status=400)
+
+        self.push_manager.async_handle_notifications(data.get("value", []))
+        return web_response.Response(status=202)
+
+
+def build_push_resource(component, endpoint):
+    """Subscription resources are relative to the API version root."""
+    return component.build_url(endpoint).removeprefix(component.protocol.service_url)
+
+
+def _expiration():
+    expiration = dt_util.utcnow() + timedelta(minutes=PUSH_SUBSCRIPTION_MINUTES)
+    return expiration.isoformat()
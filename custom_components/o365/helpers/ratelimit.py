@@ -0,0 +1,90 @@
+"""MS Graph rate limiting."""
+
+import asyncio
+import contextlib
+import time
+from collections import deque
+
+from homeassistant.core import callback
+
+from ..const import RATE_LIMIT_BURST, RATE_LIMIT_LANES, RATE_LIMIT_WAIT_SAMPLES
+
+
+class O365RateLimiter:
+    """Token bucket shared by every MS Graph call made for one account.
+
+    Calls wait in a lane by priority when the bucket is empty, so interactive
+    service calls are let through ahead of background polling.
+    """
+
+    def __init__(self, hass, rate, burst=RATE_LIMIT_BURST):
+        """Initialise the rate limiter."""
+        self._hass = hass
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lanes = {lane: deque() for lane in RATE_LIMIT_LANES}
+        self._wakeup = None
+        self._waits = deque(maxlen=RATE_LIMIT_WAIT_SAMPLES)
+
+    @property
+    def queue_depth(self):
+        """Calls waiting for a token."""
+        return sum(len(waiters) for waiters in self._lanes.values())
+
+    @property
+    def lane_depths(self):
+        """Calls waiting for a token in each lane."""
+        return {lane: len(waiters) for lane, waiters in self._lanes.items()}
+
+    @property
+    def wait_time(self):
+        """Average seconds recent calls waited for a token."""
+        if not self._waits:
+            return 0
+        return sum(self._waits) / len(self._waits)
+
+    async def async_acquire(self, priority):
+        """Wait for a token, taking one straight away if nothing is queued."""
+        self._refill()
+        if self._tokens >= 1 and not self.queue_depth:
+            self._tokens -= 1
+            self._waits.append(0)
+            return
+
+        future = self._hass.loop.create_future()
+        self._lanes[priority].append(future)
+        self._schedule_wakeup()
+        start = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            with contextlib.suppress(ValueError):
+                self._lanes[priority].remove(future)
+            raise
+        self._waits.append(time.monotonic() - start)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    def _schedule_wakeup(self):
+        if self._wakeup is None and self.queue_depth:
+            delay = max((1 - self._tokens) / self._rate, 0)
+            self._wakeup = self._hass.loop.call_later(delay, self._release)
+
+    @callback
+    def _release(self):
+        self._wakeup = None
+        self._refill()
+        for waiters in self._lanes.values():
+            while waiters and self._tokens >= 1:
+                future = waiters.popleft()
+                if not future.done():
+                    future.set_result(None)
+                    self._tokens -= 1
+        self._schedule_wakeup()
@@ -7,22 +7,37 @@ from homeassistant.const import CONF_ENABLED
 from homeassistant.helpers import discovery
 
 from ..const import (
+    CHAT_MEMBER_CACHE_SIZE,
+    CHAT_MEMBER_CACHE_TTL,
     CONF_ACCOUNT_NAME,
-    CONF_CHAT_SENSORS,
+    CONF_ATTACHMENT_STORE,
+    CONF_ATTACHMENT_STORE_SIZE,
+    CONF_CHAT_MEMBER_CACHE,
     CONF_COORDINATOR_EMAIL,
     CONF_COORDINATOR_SENSORS,
-    CONF_EMAIL_SENSORS,
     CONF_ENABLE_CALENDAR,
     CONF_ENABLE_UPDATE,
     CONF_KEYS_EMAIL,
     CONF_KEYS_SENSORS,
-    CONF_QUERY_SENSORS,
-    CONF_STATUS_SENSORS,
+    CONF_MAILBOX_REGISTRY,
+    CONF_OUTBOX,
+    CONF_PUSH_MANAGER,
+    CONF_PUSH_NOTIFICATIONS,
+    CONF_RATE_LIMIT,
+    CONF_RATE_LIMITER,
+    CONF_THROTTLE,
     CONF_TODO_SENSORS,
     DOMAIN,
 )
 from ..utils.utils import build_account_config
+from .attachments import O365AttachmentStore
+from .cache import O365TTLCache
 from .coordinator import O365EmailCordinator, O365SensorCordinator
+from .folders import O365MailboxRegistry
+from .outbox import O365Outbox
+from .push import O365PushManager
+from .ratelimit import O365RateLimiter
+from .throttle import O365Throttle
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,6 +49,28 @@ async def do_setup(
     account_config = build_account_config(
         config, account, is_authenticated, conf_type, perms
     )
+    rate_limiter = O365RateLimiter(hass, account_config[CONF_RATE_LIMIT])
+    account_config[CONF_RATE_LIMITER] = rate_limiter
+    account_config[CONF_THROTTLE] = O365Throttle(hass, account_name, rate_limiter)
+    account_config[CONF_CHAT_MEMBER_CACHE] = O365TTLCache(
+        CHAT_MEMBER_CACHE_SIZE, CHAT_MEMBER_CACHE_TTL
+    )
+    account_config[CONF_MAILBOX_REGISTRY] = O365MailboxRegistry(
+        hass, account_config, account, account_config[CONF_THROTTLE]
+    )
+    account_config[CONF_ATTACHMENT_STORE] = O365AttachmentStore(
+        hass, account_config, account_config[CONF_ATTACHMENT_STORE_SIZE]
+    )
+    previous_config = hass.data.get(DOMAIN, {}).get(account_name, {})
+    # A re-setup subscribes again, so drop the previous run's subscriptions
+    if previous_push_manager := previous_config.get(CONF_PUSH_MANAGER):
+        await previous_push_manager.async_stop()
+    if account_config[CONF_ENABLE_UPDATE]:
+        # A re-setup takes over sending the previous run's queued messages
+        if previous_outbox := previous_config.get(CONF_OUTBOX):
+            previous_outbox.async_stop()
+        account_config[CONF_OUTBOX] = O365Outbox(hass, account_config)
+        await account_config[CONF_OUTBOX].async_start()
 
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {}
@@ -52,6 +89,13 @@ async def do_setup(
     hass.data[DOMAIN][account_name][CONF_KEYS_EMAIL] = email_keys
     hass.data[DOMAIN][account_name][CONF_COORDINATOR_EMAIL] = email_coordinator
 
+    if account_config[CONF_PUSH_NOTIFICATIONS]:
+        push_manager = O365PushManager(hass, account_config)
+        if push_manager.async_setup():
+            hass.data[DOMAIN][account_name][CONF_PUSH_MANAGER] = push_manager
+            await sensor_coordinator.async_setup_push(push_manager)
+            await email_coordinator.async_setup_push(push_manager)
+
     _load_platforms(hass, account_name, config, account_config)
 
 
@@ -88,17 +132,12 @@ def _load_platforms(hass, account_name, config, account_config):
                 hass, "notify", DOMAIN, {CONF_ACCOUNT_NAME: account_name}, config
             )
         )
-    if (
-        len(account_config[CONF_EMAIL_SENSORS]) > 0
-        or len(account_config[CONF_QUERY_SENSORS]) > 0
-        or len(account_config[CONF_STATUS_SENSORS]) > 0
-        or len(account_config[CONF_CHAT_SENSORS]) > 0
-    ):
-        hass.async_create_task(
-            discovery.async_load_platform(
-                hass, "sensor", DOMAIN, {CONF_ACCOUNT_NAME: account_name}, config
-            )
+    # Always loaded for the API sensor
+    hass.async_create_task(
+        discovery.async_load_platform(
+            hass, "sensor", DOMAIN, {CONF_ACCOUNT_NAME: account_name}, config
         )
+    )
 
     if len(account_config[CONF_TODO_SENSORS]) > 0 and account_config[
         CONF_TODO_SENSORS
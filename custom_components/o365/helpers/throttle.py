@@ -0,0 +1,143 @@
+"""MS Graph throttling handling."""
+
+import logging
+import random
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+from homeassistant.util import dt as dt_util
+from requests.exceptions import RequestException, RetryError
+
+from ..const import (
+    RATE_LIMIT_BACKGROUND,
+    THROTTLE_BACKOFF_BASE,
+    THROTTLE_BACKOFF_MAX,
+    THROTTLE_JITTER,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# How urllib3 reports the O365 library running out of retries on 429 responses
+RETRIED_TOO_MANY_REQUESTS = f"too many {HTTPStatus.TOO_MANY_REQUESTS} error responses"
+
+
+class O365ThrottledError(RequestException):
+    """A call was not made because its resource is backing off."""
+
+
+class O365Throttle:
+    """Back off from the MS Graph resources throttling an account.
+
+    Graph throttles each service separately, so a throttled mailbox pauses
+    only the calls for that resource class. The pause is the Retry-After the
+    service asked for, or an exponential backoff when it gave none, with
+    jitter so that entities do not all retry together.
+
+    Calls made through async_call also wait their turn with the account's
+    rate limiter.
+    """
+
+    def __init__(self, hass, account_name, rate_limiter):
+        """Initialise the throttle."""
+        self._hass = hass
+        self._account_name = account_name
+        self._rate_limiter = rate_limiter
+        # Resource class to [backoff end, consecutive throttled responses]
+        self._backoffs = {}
+
+    def throttled_until(self, resource):
+        """End of the backoff for a resource class, None if it is not backing off."""
+        backoff = self._backoffs.get(resource)
+        if backoff and backoff[0] > dt_util.utcnow():
+            return backoff[0]
+        return None
+
+    @property
+    def state(self):
+        """Current backoffs by resource class, for diagnostics."""
+        return {
+            resource: until.isoformat()
+            for resource in list(self._backoffs)
+            if (until := self.throttled_until(resource))
+        }
+
+    def call(self, resource, func, *args):
+        """Make an API call unless its resource class is backing off."""
+        self._check(resource)
+        try:
+            result = func(*args)
+        except RequestException as err:
+            self._record_error(resource, err)
+            raise
+        self._backoffs.pop(resource, None)
+        return result
+
+    async def async_call(self, resource, func, *args, priority=RATE_LIMIT_BACKGROUND):
+        """Make an API call in the executor unless its resource class is backing off."""
+        self._check(resource)
+        await self._rate_limiter.async_acquire(priority)
+        return await self._hass.async_add_executor_job(self.call, resource, func, *args)
+
+    def _check(self, resource):
+        if until := self.throttled_until(resource):
+            raise O365ThrottledError(f"Throttled by MS Graph until {until.isoformat()}")
+
+    def _record_error(self, resource, err):
+        if not is_throttle_error(err) or isinstance(err, O365ThrottledError):
+            return
+        failures = self._backoffs.get(resource, [None, 0])[1] + 1
+        delay = _retry_after(err)
+        if delay is None:
+            delay = min(
+                THROTTLE_BACKOFF_BASE * 2 ** (failures - 1), THROTTLE_BACKOFF_MAX
+            )
+        # Never retry sooner than asked, only later
+        delay *= random.uniform(1, 1 + THROTTLE_JITTER)
+        until = dt_util.utcnow() + timedelta(seconds=delay)
+        self._backoffs[resource] = [until, failures]
+        _LOGGER.warning(
+            "MS Graph is throttling %s requests for account: %s, pausing for %s seconds",
+            resource,
+            self._account_name,
+            round(delay),
+        )
+
+
+def is_throttle_error(err):
+    """Check whether an error came from MS Graph throttling.
+
+    That is a 429 response, or a 503 response with a Retry-After. Other server
+    errors are failures, not throttling.
+    """
+    if isinstance(err, O365ThrottledError):
+        return True
+    # The O365 library retries throttled calls itself, raising RetryError when
+    # it runs out of retries, whichever status it was retrying
+    if isinstance(err, RetryError):
+        return RETRIED_TOO_MANY_REQUESTS in str(err)
+    response = getattr(err, "response", None)
+    if response is None:
+        return False
+    if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+        return True
+    return (
+        response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        and "Retry-After" in response.headers
+    )
+
+
+def _retry_after(err):
+    """Seconds to wait from the Retry-After header, as seconds or an http date."""
+    response = getattr(err, "response", None)
+    if response is None or not (retry_after := response.headers.get("Retry-After")):
+        return None
+    try:
+        return max(float(retry_after), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - dt_util.utcnow()).total_seconds(), 0)
@@ -0,0 +1,140 @@
+"""MS Graph upload sessions for large email attachments."""
+
+import logging
+import os
+import time
+
+from O365.message import Message, MessageAttachments
+from requests.exceptions import HTTPError, RequestException
+
+from ..const import GRAPH_UPLOAD_CHUNK_SIZE, GRAPH_UPLOAD_RETRIES
+
+_LOGGER = logging.getLogger(__name__)
+
+# pylint: disable=protected-access
+_ATTACHMENT_ENDPOINTS = MessageAttachments._endpoints
+_MESSAGE_ENDPOINTS = Message._endpoints
+# pylint: enable=protected-access
+
+
+def send_with_upload_sessions(con, resource_url, message, file_paths):
+    """Send a message, uploading the files to it in chunks, runs in the executor.
+
+    The message, as MS Graph data, is created as a draft so the files can be
+    uploaded to it, then sent. If an upload fails, the draft is deleted.
+    """
+    response = con.post(
+        f"{resource_url}{_MESSAGE_ENDPOINTS.get('create_draft')}", data=message
+    )
+    if not response:
+        return False
+    message_id = response.json()["id"]
+    session_url = f"{resource_url}{_ATTACHMENT_ENDPOINTS.get('create_upload_session')}"
+
+    uploaded = False
+    try:
+        uploaded = all(
+            upload_attachment(con, session_url.format(id=message_id), file_path)
+            for file_path in file_paths
+        )
+    finally:
+        if not uploaded:
+            con.delete(
+                f"{resource_url}"
+                f"{_MESSAGE_ENDPOINTS.get('get_message').format(id=message_id)}"
+            )
+    if not uploaded:
+        return False
+    return bool(
+        con.post(
+            f"{resource_url}"
+            f"{_MESSAGE_ENDPOINTS.get('send_draft').format(id=message_id)}"
+        )
+    )
+
+
+def upload_attachment(con, session_url, file_path, chunk_size=GRAPH_UPLOAD_CHUNK_SIZE):
+    """Attach a file to a draft message through an upload session.
+
+    The file is read from disk a chunk at a time. After a transient error the
+    session is asked which bytes it still expects, and the upload carries on
+    from there.
+    """
+    size = os.path.getsize(file_path)
+    response = con.post(
+        session_url,
+        data={
+            "AttachmentItem": {
+                "attachmentType": "file",
+                "name": os.path.basename(file_path),
+                "size": size,
+            }
+        },
+    )
+    if not response or not (upload_url := response.json().get("uploadUrl")):
+        _LOGGER.error("Upload session not created for %s", file_path)
+        return False
+
+    offset = 0
+    retries = 0
+    with open(file_path, "rb") as file:
+        while offset < size:
+            file.seek(offset)
+            chunk = file.read(chunk_size)
+            try:
+                response = _put_chunk(con, upload_url, chunk, offset, size)
+            except RequestException as err:
+                retries += 1
+                if not _is_transient(err) or retries > GRAPH_UPLOAD_RETRIES:
+                    _LOGGER.error("Upload of %s failed - %s", file_path, err)
+                    return False
+                _LOGGER.debug(
+                    "Upload of %s interrupted at byte %s - %s", file_path, offset, err
+                )
+                time.sleep(2 ** (retries - 1))
+                offset = _next_expected_offset(con, upload_url, offset)
+                continue
+
+            retries = 0
+            offset += len(chunk)
+            # 201 Created once the last byte is received
+            if response.status_code == 201:
+                break
+    return True
+
+
+def _put_chunk(con, upload_url, chunk, offset, size):
+    # The upload url carries its own authorisation, so must be sent without the
+    # account's token
+    return con.naive_request(
+        upload_url,
+        "PUT",
+        data=chunk,
+        headers={
+            "Content-Type": "application/octet-stream",
+            "Content-Length": str(len(chunk)),
+            "Content-Range": f"bytes {offset}-{offset + len(chunk) - 1}/{size}",
+        },
+    )
+
+
+def _next_expected_offset(con, upload_url, offset):
+    """Ask the session for the first byte it still expects, keeping offset if unknown."""
+    try:
+        response = con.naive_request(upload_url, "GET")
+        ranges = response.json().get("nextExpectedRanges") or []
+        return int(ranges[0].split("-")[0]) if ranges else offset
+    except (RequestException, ValueError):
+        return offset
+
+
+def _is_transient(err):
+    """Connection errors, timeouts, throttling and server errors are worth retrying.
+
+    416 Range Not Satisfiable means the session expected other bytes, so the
+    upload carries on from those.
+    """
+    if not isinstance(err, HTTPError) or err.response is None:
+        return True
+    status = err.response.status_code
+    return status >= 500 or status in (408, 416, 429)
@@ -2,6 +2,8 @@
 
 import logging
 import os
+import shutil
+import tempfile
 import zipfile
 from pathlib import Path
 
@@ -19,14 +21,20 @@ from .const import (
     ATTR_PHOTOS,
     ATTR_SENDER,
     ATTR_ZIP_ATTACHMENTS,
+    ATTR_ZIP_COMPRESSION_LEVEL,
     ATTR_ZIP_NAME,
     CONF_ACCOUNT,
     CONF_ACCOUNT_NAME,
     CONF_IS_AUTHENTICATED,
+    CONF_OUTBOX,
     CONF_PERMISSIONS,
+    CONF_THROTTLE,
     DOMAIN,
+    GRAPH_UPLOAD_SIZE_LIMIT_SIMPLE,
     LEGACY_ACCOUNT_NAME,
     PERM_MAIL_SEND,
+    RATE_LIMIT_INTERACTIVE,
+    THROTTLE_DIRECTORY,
 )
 from .schema import NOTIFY_SERVICE_BASE_SCHEMA
 
@@ -61,7 +69,8 @@ class O365EmailService(BaseNotificationService):
         """Initialize the service."""
         self.account = account
         self._config = config
-        self._cleanup_files = []
+        self._outbox = config[CONF_OUTBOX]
+        self._user_mail = None
         self._hass = hass
         self._account_name = config.get(CONF_ACCOUNT_NAME, None)
         if self._account_name:
@@ -87,7 +96,6 @@ class O365EmailService(BaseNotificationService):
             )
             return
 
-        self._cleanup_files = []
         data = kwargs.get(ATTR_DATA)
         if data is None:
             kwargs.pop(ATTR_DATA)
@@ -99,12 +107,37 @@ class O365EmailService(BaseNotificationService):
         if data and data.get(ATTR_TARGET, None):
             target = data.get(ATTR_TARGET)
         else:
-            resp = await self.hass.async_add_executor_job(self.account.get_current_user)
-            target = resp.mail
+            target = await self._async_get_user_mail()
+
+        # Temporary directories holding the zip files built for this message
+        temp_dirs = []
+        try:
+            # Reading and zipping files is blocking, so is kept off the event loop
+            new_message, large_attachments = await self.hass.async_add_executor_job(
+                self._build_new_message, target, title, message, data, temp_dirs
+            )
+            await self._outbox.async_enqueue(new_message, large_attachments, temp_dirs)
+        except (OSError, ValueError):
+            await self.hass.async_add_executor_job(_remove_dirs, temp_dirs)
+            raise
+
+    async def _async_get_user_mail(self):
+        if not self._user_mail:
+            resp = await self._config[CONF_THROTTLE].async_call(
+                THROTTLE_DIRECTORY,
+                self.account.get_current_user,
+                priority=RATE_LIMIT_INTERACTIVE,
+            )
+            self._user_mail = resp.mail
+        return self._user_mail
 
-        new_message = await self.hass.async_add_executor_job(self.account.new_message)
+    def _build_new_message(self, target, title, message, data, temp_dirs):
+        """Build the message and return it with the attachments to upload to it."""
+        new_message = self.account.new_message()
         message = self._build_message(data, message, new_message.attachments)
-        self._build_attachments(data, new_message.attachments)
+        large_attachments = self._build_attachments(
+            data, new_message.attachments, temp_dirs
+        )
         new_message.to.add(target)
         if data:
             if data.get(ATTR_SENDER, None):
@@ -113,9 +146,7 @@ class O365EmailService(BaseNotificationService):
                 new_message.importance = data.get(ATTR_IMPORTANCE)
         new_message.subject = title
         new_message.body = message
-        await self.hass.async_add_executor_job(new_message.send)
-
-        self._cleanup()
+        return new_message, large_attachments
 
     def _build_message(self, data, message, new_message_attachments):
         is_html = False
@@ -151,28 +182,38 @@ class O365EmailService(BaseNotificationService):
 
         return photos_content
 
-    def _build_attachments(self, data, new_message_attachments):
+    def _build_attachments(self, data, new_message_attachments, temp_dirs):
+        """Add the attachments small enough to send in the message, return the rest."""
         attachments = []
         zip_attachments = False
         zip_name = None
+        compression_level = None
         if data:
             attachments = data.get(ATTR_ATTACHMENTS, [])
             zip_attachments = data.get(ATTR_ZIP_ATTACHMENTS, False)
             zip_name = data.get(ATTR_ZIP_NAME, None)
+            compression_level = data.get(ATTR_ZIP_COMPRESSION_LEVEL, None)
 
         attachments = [self._get_ha_filepath(x) for x in attachments]
         if attachments and zip_attachments:
-            z_file = zip_files(attachments, zip_name)
-            new_message_attachments.add(z_file)
-            self._cleanup_files.append(z_file)
-
-        else:
-            for attachment in attachments:
+            z_file = zip_files(
+                attachments, zip_name, compression_level, self._outbox.directory
+            )
+            temp_dirs.append(os.path.dirname(z_file))
+            attachments = [z_file]
+
+        # Graph only takes up to 3 MB of attachments in the message itself,
+        # counted once base64 encoded, and the inline photos come first
+        inline_size = sum(len(x.content or "") for x in new_message_attachments)
+        large_attachments = []
+        for attachment in attachments:
+            size = _encoded_size(os.path.getsize(attachment))
+            if inline_size + size > GRAPH_UPLOAD_SIZE_LIMIT_SIMPLE:
+                large_attachments.append(attachment)
+            else:
+                inline_size += size
                 new_message_attachments.add(attachment)
-
-    def _cleanup(self):
-        for filename in self._cleanup_files:
-            os.remove(filename)
+        return large_attachments
 
     def _get_ha_filepath(self, filepath):
         """Get the file path."""
@@ -187,14 +228,38 @@ class O365EmailService(BaseNotificationService):
         return _filepath
 
 
-def zip_files(filespaths, zip_name):
-    """Zip the files."""
+def zip_files(filespaths, zip_name, compression_level=None, directory=None):
+    """Zip the files into a new temporary directory, runs in the executor.
+
+    The temporary directory is made within directory when given. Each file is
+    copied into the zip in blocks, so is never held in memory. Without a
+    compression level the files are stored uncompressed.
+    """
     if not zip_name:
         zip_name = "archive.zip"
     if Path(zip_name).suffix != ".zip":
         zip_name += ".zip"
-
-    with zipfile.ZipFile(zip_name, mode="w") as zip_file:
+    # A directory of its own keeps the name free for concurrent notifications
+    zip_dir = tempfile.mkdtemp(prefix="o365_", dir=directory)
+    zip_path = os.path.join(zip_dir, os.path.basename(zip_name))
+
+    if compression_level is None:
+        compression = zipfile.ZIP_STORED
+    else:
+        compression = zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(
+        zip_path, mode="w", compression=compression, compresslevel=compression_level
+    ) as zip_file:
         for file_path in filespaths:
             zip_file.write(file_path, os.path.basename(file_path))
-    return zip_name
+    return zip_path
+
+
+def _encoded_size(size):
+    """Size of a file's content once base64 encoded."""
+    return -(-size // 3) * 4
+
+
+def _remove_dirs(temp_dirs):
+    for temp_dir in temp_dirs:
+        shutil.rmtree(temp_dir, ignore_errors=True)
@@ -32,6 +32,7 @@ from O365.utils import ImportanceLevel  # pylint: disable=no-name-in-module
 
 from .const import (
     ATTR_ACTIVITY,
+    ATTR_ATTACHMENT_NAME,
     ATTR_ATTACHMENTS,
     ATTR_ATTENDEES,
     ATTR_AVAILABILITY,
@@ -64,19 +65,28 @@ from .const import (
     ATTR_SUBJECT,
     ATTR_TODO_ID,
     ATTR_TYPE,
+    ATTR_UID,
     ATTR_ZIP_ATTACHMENTS,
+    ATTR_ZIP_COMPRESSION_LEVEL,
     ATTR_ZIP_NAME,
+    BODY_MODES,
     CONF_ACCOUNT_NAME,
     CONF_ACCOUNTS,
+    CONF_ADAPTIVE_POLLING,
     CONF_ALT_AUTH_METHOD,
+    CONF_ATTACHMENT_STORE_SIZE,
     CONF_AUTO_REPLY_SENSORS,
     CONF_BASIC_CALENDAR,
+    CONF_BATCH_REQUESTS,
     CONF_BODY_CONTAINS,
+    CONF_BODY_MODE,
     CONF_CAL_ID,
     CONF_CHAT_SENSORS,
     CONF_CLIENT_ID,
     CONF_CLIENT_SECRET,
+    CONF_DELTA_SYNC,
     CONF_DEVICE_ID,
+    CONF_DOWNLOAD_ATTACHMENT_CONTENT,
     CONF_DOWNLOAD_ATTACHMENTS,
     CONF_DUE_HOURS_BACKWARD_TO_GET,
     CONF_DUE_HOURS_FORWARD_TO_GET,
@@ -94,9 +104,12 @@ from .const import (
     CONF_IS_UNREAD,
     CONF_MAIL_FOLDER,
     CONF_MAIL_FROM,
+    CONF_MAX_CONCURRENT_UPDATES,
     CONF_MAX_ITEMS,
     CONF_MAX_RESULTS,
+    CONF_PUSH_NOTIFICATIONS,
     CONF_QUERY_SENSORS,
+    CONF_RATE_LIMIT,
     CONF_SEARCH,
     CONF_SHARED_MAILBOX,
     CONF_SHOW_BODY,
@@ -108,9 +121,14 @@ from .const import (
     CONF_TRACK,
     CONF_TRACK_NEW,
     CONF_TRACK_NEW_CALENDAR,
+    CONF_UPDATE_TIMEOUT,
     CONF_URL,
     CONF_YAML_TASK_LIST_ID,
     CONTENT_TYPES,
+    DEFAULT_ATTACHMENT_STORE_SIZE,
+    DEFAULT_MAX_CONCURRENT_UPDATES,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_UPDATE_TIMEOUT,
     EventResponse,
 )
 
@@ -153,8 +171,11 @@ EMAIL_SENSOR = vol.Schema(
         vol.Optional(CONF_MAX_ITEMS, default=5): int,
         vol.Optional(CONF_IS_UNREAD): bool,
         vol.Optional(CONF_DOWNLOAD_ATTACHMENTS, default=True): bool,
+        vol.Optional(CONF_DOWNLOAD_ATTACHMENT_CONTENT, default=False): bool,
         vol.Optional(CONF_HTML_BODY, default=False): bool,
         vol.Optional(CONF_SHOW_BODY, default=True): bool,
+        vol.Optional(CONF_BODY_MODE): vol.In(BODY_MODES),
+        vol.Optional(CONF_DELTA_SYNC, default=False): bool,
     }
 )
 STATUS_SENSOR = vol.Schema(
@@ -191,8 +212,10 @@ QUERY_SENSOR = vol.Schema(
         vol.Exclusive(CONF_SUBJECT_CONTAINS, "subject_*"): cv.string,
         vol.Exclusive(CONF_SUBJECT_IS, "subject_*"): cv.string,
         vol.Optional(CONF_DOWNLOAD_ATTACHMENTS, default=True): bool,
+        vol.Optional(CONF_DOWNLOAD_ATTACHMENT_CONTENT, default=False): bool,
         vol.Optional(CONF_HTML_BODY, default=False): bool,
         vol.Optional(CONF_SHOW_BODY, default=True): bool,
+        vol.Optional(CONF_BODY_MODE): vol.In(BODY_MODES),
     }
 )
 TODO_SENSOR = vol.Schema(
@@ -200,6 +223,7 @@ TODO_SENSOR = vol.Schema(
         vol.Required(CONF_ENABLED, default=False): bool,
         vol.Optional(CONF_TRACK_NEW, default=True): bool,
         vol.Optional(CONF_ENABLE_UPDATE, default=False): bool,
+        vol.Optional(CONF_DELTA_SYNC, default=False): bool,
     }
 )
 
@@ -224,6 +248,23 @@ MULTI_ACCOUNT_SCHEMA = vol.Schema(
                     vol.Optional(CONF_TODO_SENSORS): TODO_SENSOR,
                     vol.Optional(CONF_AUTO_REPLY_SENSORS): [AUTO_REPLY_SENSOR],
                     vol.Optional(CONF_SHARED_MAILBOX, None): cv.string,
+                    vol.Optional(
+                        CONF_MAX_CONCURRENT_UPDATES,
+                        default=DEFAULT_MAX_CONCURRENT_UPDATES,
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_UPDATE_TIMEOUT, default=DEFAULT_UPDATE_TIMEOUT
+                    ): cv.positive_int,
+                    vol.Optional(
+                        CONF_RATE_LIMIT, default=DEFAULT_RATE_LIMIT
+                    ): cv.positive_int,
+                    vol.Optional(CONF_BATCH_REQUESTS, default=False): bool,
+                    vol.Optional(CONF_PUSH_NOTIFICATIONS, default=False): bool,
+                    vol.Optional(CONF_ADAPTIVE_POLLING, default=True): bool,
+                    vol.Optional(
+                        CONF_ATTACHMENT_STORE_SIZE,
+                        default=DEFAULT_ATTACHMENT_STORE_SIZE,
+                    ): cv.positive_int,
                 }
             ]
         )
@@ -237,6 +278,9 @@ NOTIFY_SERVICE_DATA_SCHEMA = vol.Schema(
         vol.Optional(ATTR_SENDER): cv.string,
         vol.Optional(ATTR_ZIP_ATTACHMENTS, default=False): bool,
         vol.Optional(ATTR_ZIP_NAME): cv.string,
+        vol.Optional(ATTR_ZIP_COMPRESSION_LEVEL): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=9)
+        ),
         vol.Optional(ATTR_PHOTOS, default=[]): [cv.string],
         vol.Optional(ATTR_ATTACHMENTS, default=[]): [cv.string],
         vol.Optional(ATTR_IMPORTANCE): vol.Coerce(ImportanceLevel),
@@ -353,6 +397,11 @@ AUTO_REPLY_SERVICE_ENABLE_SCHEMA = {
 
 AUTO_REPLY_SERVICE_DISABLE_SCHEMA = {}
 
+EMAIL_SERVICE_GET_ATTACHMENT_SCHEMA = {
+    vol.Required(ATTR_UID): cv.string,
+    vol.Required(ATTR_ATTACHMENT_NAME): cv.string,
+}
+
 
 YAML_CALENDAR_ENTITY_SCHEMA = vol.Schema(
     {
@@ -364,6 +413,7 @@ YAML_CALENDAR_ENTITY_SCHEMA = vol.Schema(
         vol.Optional(CONF_EXCLUDE): [cv.string],
         vol.Optional(CONF_TRACK): cv.boolean,
         vol.Optional(CONF_MAX_RESULTS): cv.positive_int,
+        vol.Optional(CONF_DELTA_SYNC, default=False): cv.boolean,
     }
 )
 
@@ -3,8 +3,11 @@
 import logging
 
 from homeassistant.const import CONF_EMAIL, CONF_NAME, CONF_UNIQUE_ID
+from homeassistant.core import SupportsResponse
 from homeassistant.helpers import entity_platform
+from homeassistant.helpers.entity import async_generate_entity_id
 
+from .classes.apisensor import O365ApiSensor
 from .classes.mailsensor import O365AutoReplySensor, O365MailSensor
 from .classes.teamssensor import O365TeamsChatSensor, O365TeamsStatusSensor
 from .const import (
@@ -23,6 +26,8 @@ from .const import (
     CONF_SENSOR_CONF,
     CONF_STATUS_SENSORS,
     DOMAIN,
+    ENTITY_ID_FORMAT_SENSOR,
+    LEGACY_ACCOUNT_NAME,
     PERM_CHAT_READWRITE,
     PERM_MAILBOX_SETTINGS,
     PERM_PRESENCE_READWRITE,
@@ -34,6 +39,7 @@ from .schema import (
     AUTO_REPLY_SERVICE_DISABLE_SCHEMA,
     AUTO_REPLY_SERVICE_ENABLE_SCHEMA,
     CHAT_SERVICE_SEND_MESSAGE_SCHEMA,
+    EMAIL_SERVICE_GET_ATTACHMENT_SCHEMA,
     STATUS_SERVICE_UPDATE_USER_PERERRED_STATUS_SCHEMA,
     STATUS_SERVICE_UPDATE_USER_STATUS_SCHEMA,
 )
@@ -55,7 +61,7 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
 
     sensor_entities = await _async_sensor_entities(conf, hass)
     email_entities = _email_entities(conf)
-    entities = sensor_entities + email_entities
+    entities = sensor_entities + email_entities + _api_entities(conf, hass)
 
     async_add_entities(entities, False)
     await _async_setup_register_services(conf)
@@ -118,11 +124,12 @@ async def _async_sensor_entities(conf, hass):
 
 def _email_entities(conf):
     email_coordinator = conf[CONF_COORDINATOR_EMAIL]
-    _LOGGER.warning(
-        "The O365 Email sensors are now deprecated - please migrate to MS365 Mail "
-        + "- for more details on how to do this see "
-        + "https://rogerselwyn.github.io/O365-HomeAssistant/migration.html"
-    )
+    if conf[CONF_KEYS_EMAIL]:
+        _LOGGER.warning(
+            "The O365 Email sensors are now deprecated - please migrate to MS365 Mail "
+            + "- for more details on how to do this see "
+            + "https://rogerselwyn.github.io/O365-HomeAssistant/migration.html"
+        )
     return [
         O365MailSensor(
             email_coordinator,
@@ -136,11 +143,27 @@ def _email_entities(conf):
     ]
 
 
+def _api_entities(conf, hass):
+    account_name = conf[CONF_ACCOUNT_NAME]
+    name = "O365 API"
+    if account_name != LEGACY_ACCOUNT_NAME:
+        name = f"{name} {account_name}"
+    return [
+        O365ApiSensor(
+            conf,
+            name,
+            async_generate_entity_id(ENTITY_ID_FORMAT_SENSOR, name, hass=hass),
+            f"api_{account_name}",
+        )
+    ]
+
+
 async def _async_setup_register_services(config):
     perms = config[CONF_PERMISSIONS]
     await _async_setup_status_services(config, perms)
     await _async_setup_chat_services(config, perms)
     await _async_setup_mailbox_services(config, perms)
+    await _async_setup_email_services(config)
 
 
 async def _async_setup_status_services(config, perms):
@@ -184,6 +207,19 @@ async def _async_setup_chat_services(config, perms):
         )
 
 
+async def _async_setup_email_services(config):
+    if not config[CONF_KEYS_EMAIL]:
+        return
+
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        "get_attachment",
+        EMAIL_SERVICE_GET_ATTACHMENT_SCHEMA,
+        "async_get_attachment",
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
 async def _async_setup_mailbox_services(config, perms):
     if not config.get(CONF_ENABLE_UPDATE):
         return
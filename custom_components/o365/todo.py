@@ -17,6 +17,7 @@ from O365.utils.query import (  # pylint: disable=no-name-in-module, import-erro
 from .classes.entity import O365Entity
 from .const import (
     ATTR_ALL_TODOS,
+    ATTR_CHANGED,
     ATTR_COMPLETED,
     ATTR_CREATED,
     ATTR_DATA,
@@ -40,6 +41,7 @@ from .const import (
     CONF_O365_TASK_FOLDER,
     CONF_PERMISSIONS,
     CONF_SHOW_COMPLETED,
+    CONF_THROTTLE,
     CONF_TODO_SENSORS,
     CONF_TRACK_NEW,
     CONF_YAML_TASK_LIST,
@@ -52,6 +54,8 @@ from .const import (
     EVENT_UNCOMPLETED_TODO,
     EVENT_UPDATE_TODO,
     PERM_TASKS_READWRITE,
+    RATE_LIMIT_INTERACTIVE,
+    THROTTLE_TODO,
     TODO_TODO,
 )
 from .schema import (
@@ -172,6 +176,7 @@ class O365TodoList(O365Entity, TodoListEntity):  # pylint: disable=abstract-meth
         )
         self._state = None
         self._todo_items = None
+        self._todo_item_cache = {}
         self._extra_attributes = None
         self._update_status(hass)
         if config.get(CONF_TODO_SENSORS).get(CONF_ENABLE_UPDATE):
@@ -196,34 +201,30 @@ class O365TodoList(O365Entity, TodoListEntity):  # pylint: disable=abstract-meth
     @property
     def extra_state_attributes(self):
         """Device state attributes."""
-        return self._extra_attributes
+        return self._extra_attributes | self._throttle_attributes
 
     def _handle_coordinator_update(self) -> None:
         self._update_status(self.hass)
         self.async_write_ha_state()
 
     def _update_status(self, hass):
-        todos = self.coordinator.data[self.entity_key][ATTR_DATA]
+        data = self.coordinator.data[self.entity_key]
+        todos = data[ATTR_DATA]
+        # Delta synced lists say which tasks changed, None means check them all
+        changed = data.get(ATTR_CHANGED)
         self._state = sum(not task.completed for task in todos)
-        self._todo_items = []
+        todo_item_cache = {}
         for todo in todos:
-            completed = (
-                TodoItemStatus.COMPLETED
-                if todo.completed
-                else TodoItemStatus.NEEDS_ACTION
-            )
-            self._todo_items.append(
-                TodoItem(
-                    uid=todo.task_id,
-                    summary=todo.subject,
-                    status=completed,
-                    description=todo.body,
-                    due=todo.due.date() if todo.due else None,
-                )
-            )
-
-            self._extra_attributes = self._update_extra_state_attributes(todos)
-
+            todo_item = self._todo_item_cache.get(todo.task_id)
+            if todo_item is None or changed is None or todo.task_id in changed:
+                todo_item = _build_todo_item(todo)
+            todo_item_cache[todo.task_id] = todo_item
+        self._todo_item_cache = todo_item_cache
+        self._todo_items = list(todo_item_cache.values())
+        self._extra_attributes = self._update_extra_state_attributes(todos)
+
+        if changed is not None:
+            todos = [todo for todo in todos if todo.task_id in changed]
         todo_last_completed = self._zero_date
         todo_last_created = self._zero_date
         for todo in todos:
@@ -305,12 +306,12 @@ class O365TodoList(O365Entity, TodoListEntity):  # pylint: disable=abstract-meth
         await self._async_save_task(new_o365_task, subject, description, due, reminder)
         self._raise_event(EVENT_NEW_TODO, new_o365_task.task_id)
         self.todo_last_created = new_o365_task.created
-        await self.coordinator.async_refresh()
+        await self.coordinator.async_refresh_key(self.entity_key)
         return True
 
     async def async_update_todo_item(self, item: TodoItem) -> None:
         """Add an item to the To-do list."""
-        o365_task = await self.hass.async_add_executor_job(
+        o365_task = await self._async_call(
             self.todolist.get_task, item.uid
         )
         if item.status:
@@ -352,14 +353,14 @@ class O365TodoList(O365Entity, TodoListEntity):  # pylint: disable=abstract-meth
             return False
 
         if not o365_task:
-            o365_task = await self.hass.async_add_executor_job(
+            o365_task = await self._async_call(
                 self.todolist.get_task, todo_id
             )
         await self._async_save_task(
             o365_task, subject, description, due, reminder, hatodo
         )
         self._raise_event(EVENT_UPDATE_TODO, todo_id)
-        await self.coordinator.async_refresh()
+        await self.coordinator.async_refresh_key(self.entity_key)
         return True
 
     async def async_delete_todo_items(self, uids: list[str]) -> None:
@@ -372,12 +373,12 @@ class O365TodoList(O365Entity, TodoListEntity):  # pylint: disable=abstract-meth
         if not self._validate_task_permissions():
             return False
 
-        o365_task = await self.hass.async_add_executor_job(
+        o365_task = await self._async_call(
             self.todolist.get_task, todo_id
         )
-        await self.hass.async_add_executor_job(o365_task.delete)
+        await self._async_call(o365_task.delete)
         self._raise_event(EVENT_DELETE_TODO, todo_id)
-        await self.coordinator.async_refresh()
+        await self.coordinator.async_refresh_key(self.entity_key)
         return True
 
     async def async_complete_todo(self, todo_id, completed, o365_task=None):
@@ -386,7 +387,7 @@ class O365TodoList(O365Entity, TodoListEntity):  # pylint: disable=abstract-meth
             return False
 
         if not o365_task:
-            o365_task = await self.hass.async_add_executor_job(
+            o365_task = await self._async_call(
                 self.todolist.get_task, todo_id
             )
         if completed:
@@ -394,7 +395,7 @@ class O365TodoList(O365Entity, TodoListEntity):  # pylint: disable=abstract-meth
         else:
             await self._async_uncomplete_task(o365_task, todo_id)
 
-        await self.coordinator.async_refresh()
+        await self.coordinator.async_refresh_key(self.entity_key)
         return True
 
     async def _async_complete_task(self, o365_task, todo_id):
@@ -404,7 +405,7 @@ class O365TodoList(O365Entity, TodoListEntity):  # pylint: disable=abstract-meth
                 translation_key="todo_completed",
             )
         await self.hass.async_add_executor_job(o365_task.mark_completed)
-        await self.hass.async_add_executor_job(o365_task.save)
+        await self._async_call(o365_task.save)
         self._raise_event(EVENT_COMPLETED_TODO, todo_id)
         self.todo_last_completed = dt_util.utcnow()
 
@@ -415,7 +416,7 @@ class O365TodoList(O365Entity, TodoListEntity):  # pylint: disable=abstract-meth
                 translation_key="todo_not_completed",
             )
         await self.hass.async_add_executor_job(o365_task.mark_uncompleted)
-        await self.hass.async_add_executor_job(o365_task.save)
+        await self._async_call(o365_task.save)
         self._raise_event(EVENT_UNCOMPLETED_TODO, todo_id)
 
     async def _async_save_task(
@@ -448,7 +449,7 @@ class O365TodoList(O365Entity, TodoListEntity):  # pylint: disable=abstract-meth
         if reminder:
             o365_task.reminder = reminder
 
-        await self.hass.async_add_executor_job(o365_task.save)
+        await self._async_call(o365_task.save)
 
     def _raise_event(self, event_type, todo_id):
         self.hass.bus.fire(
@@ -472,6 +473,19 @@ def _raise_event_external(hass, event_type, todo_id, time_type, task_datetime):
     _LOGGER.debug("%s - %s - %s", event_type, todo_id, task_datetime)
 
 
+def _build_todo_item(todo):
+    completed = (
+        TodoItemStatus.COMPLETED if todo.completed else TodoItemStatus.NEEDS_ACTION
+    )
+    return TodoItem(
+        uid=todo.task_id,
+        summary=todo.subject,
+        status=completed,
+        description=todo.body,
+        due=todo.due.date() if todo.due else None,
+    )
+
+
 async def async_build_todo_query(builder: QueryBuilder, key):
     """Build query for ToDo."""
     o365_task = key[CONF_YAML_TASK_LIST]
@@ -492,6 +506,22 @@ async def async_build_todo_query(builder: QueryBuilder, key):
     return query
 
 
+def filter_todos(todos, yaml_task_list):
+    """Apply the todo query filters locally, for delta synced lists."""
+    show_completed = yaml_task_list[CONF_SHOW_COMPLETED]
+    start_offset = yaml_task_list.get(CONF_DUE_HOURS_BACKWARD_TO_GET)
+    end_offset = yaml_task_list.get(CONF_DUE_HOURS_FORWARD_TO_GET)
+    start = dt_util.utcnow() + timedelta(hours=start_offset) if start_offset else None
+    end = dt_util.utcnow() + timedelta(hours=end_offset) if end_offset else None
+    return [
+        todo
+        for todo in todos
+        if (show_completed or todo.status != "completed")
+        and (not start or (todo.due and todo.due >= start))
+        and (not end or (todo.due and todo.due <= end))
+    ]
+
+
 class O365TodoEntityServices:
     """Sensor Services."""
 
@@ -509,7 +539,9 @@ class O365TodoEntityServices:
                     config[CONF_ACCOUNT].tasks
                 )
 
-                todolists = await self._hass.async_add_executor_job(todos.list_folders)
+                todolists = await config[CONF_THROTTLE].async_call(
+                    THROTTLE_TODO, todos.list_folders, priority=RATE_LIMIT_INTERACTIVE
+                )
                 track = todo_sensor.get(CONF_TRACK_NEW)
                 for todo in todolists:
                     await async_update_task_list_file(
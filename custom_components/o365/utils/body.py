@@ -0,0 +1,345 @@
+"""Email, event and auto reply body processing."""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+
+from ..const import BODY_CACHE_MAX_SIZE
+
+_BODY_START = re.compile("<body", re.IGNORECASE)
+_CHARSET = re.compile(r"((^|;)\s*charset=)([^;]*)", re.MULTILINE)
+# Elements BeautifulSoup closes as soon as they open
+_VOID_ELEMENTS = frozenset(
+    (
+        "area",
+        "base",
+        "basefont",
+        "bgsound",
+        "br",
+        "col",
+        "command",
+        "embed",
+        "frame",
+        "hr",
+        "image",
+        "img",
+        "input",
+        "isindex",
+        "keygen",
+        "link",
+        "menuitem",
+        "meta",
+        "nextid",
+        "param",
+        "source",
+        "spacer",
+        "track",
+        "wbr",
+    )
+)
+# Elements whose text BeautifulSoup leaves out of get_text
+_HIDDEN_TEXT_ELEMENTS = frozenset(("rp", "rt", "script", "style", "template"))
+# Elements stripped from safe HTML
+_UNSAFE_ELEMENTS = frozenset(("script", "style"))
+_PRESERVE_WHITESPACE_ELEMENTS = frozenset(("pre", "textarea"))
+# Attributes holding a space separated list, which BeautifulSoup normalises
+_LIST_ATTRIBUTES = frozenset(("accesskey", "class", "dropzone"))
+_TAG_LIST_ATTRIBUTES = {
+    "a": frozenset(("rel", "rev")),
+    "area": frozenset(("rel",)),
+    "form": frozenset(("accept-charset",)),
+    "icon": frozenset(("sizes",)),
+    "iframe": frozenset(("sandbox",)),
+    "link": frozenset(("rel", "rev")),
+    "object": frozenset(("archive",)),
+    "output": frozenset(("for",)),
+    "td": frozenset(("headers",)),
+    "th": frozenset(("headers",)),
+}
+# Markup around strings which are not text, by kind
+_STRING_MARKUP = {
+    "cdata": ("<![CDATA[", "]]>"),
+    "comment": ("<!--", "-->"),
+    "declaration": ("<?", "?>"),
+    "doctype": ("<!DOCTYPE ", ">\n"),
+    "pi": ("<?", ">"),
+}
+_ASCII_SPACES = str.maketrans("", "", " \n\t\f\r")
+
+
+class O365Body:
+    """A body's plain text and safe HTML.
+
+    Bodies without a body element are passed through unchanged.
+    """
+
+    __slots__ = ("safe_html", "text")
+
+    def __init__(self, text, safe_html):
+        """Initialise the body."""
+        self.text = text
+        self.safe_html = safe_html
+
+    @property
+    def size(self):
+        """Characters held, which the cache is bounded by."""
+        return len(self.text) + len(self.safe_html)
+
+
+class _BodyCache:
+    """Parsed bodies by content hash, dropping the least recently used.
+
+    Bounded by the characters of text and HTML held rather than by entries, as
+    one newsletter can hold as much as hundreds of short emails.
+    """
+
+    def __init__(self, max_size):
+        self._max_size = max_size
+        self._size = 0
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if parsed := self._bodies.get(key):
+                self._bodies.move_to_end(key)
+            return parsed
+
+    def set(self, key, parsed):
+        if parsed.size > self._max_size:
+            return
+        with self._lock:
+            if previous := self._bodies.pop(key, None):
+                self._size -= previous.size
+            self._bodies[key] = parsed
+            self._size += parsed.size
+            while self._size > self._max_size:
+                _, dropped = self._bodies.popitem(last=False)
+                self._size -= dropped.size
+
+    def clear(self):
+        with self._lock:
+            self._bodies.clear()
+            self._size = 0
+
+
+_cache = _BodyCache(BODY_CACHE_MAX_SIZE)
+
+
+def parse_body(body):
+    """Parse a body, reusing the result for a body seen recently."""
+    # Without a body element there is nothing to parse
+    if "<" not in body or not _BODY_START.search(body):
+        return O365Body(body, body)
+
+    key = hashlib.blake2b(
+        body.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
+    if parsed := _cache.get(key):
+        return parsed
+
+    parser = _BodyParser()
+    parser.feed(body)
+    parser.close()
+    # Only the rendered strings are kept, not the body or the parser's fragments
+    if parser.found_body:
+        parsed = O365Body(_render_text(parser.text), "".join(parser.html))
+    else:
+        parsed = O365Body(body, body)
+    _cache.set(key, parsed)
+    return parsed
+
+
+def _render_text(fragments):
+    """Text of the body, one line per block of text."""
+    # get text
+    text = "".join(fragments)
+
+    # break into lines and remove leading and trailing space on each
+    lines = (line.strip() for line in text.splitlines())
+    # break multi-headlines into a line each
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    # drop blank lines
+    text = "\n".join(chunk for chunk in chunks if chunk)
+    return text.replace("\xa0", " ")
+
+
+class _BodyParser(HTMLParser):
+    """Collect the text and safe HTML of the first body element in one pass.
+
+    No tree is built. Tags open and close as they do in BeautifulSoup's
+    html.parser tree, so the text matches get_text on the body and the HTML
+    matches the body as BeautifulSoup writes it out.
+    """
+
+    def __init__(self):
+        """Initialise the parser."""
+        super().__init__(convert_charrefs=True)
+        self.found_body = False
+        self.text = []
+        self.html = []
+        self._data = []
+        # (tag name, whether its start tag was written out)
+        self._open_tags = []
+        self._body_index = None
+        self._hidden = 0
+        self._unsafe = 0
+        self._preserve_whitespace = 0
+        # Void elements opened, whose end tags are then ignored
+        self._closed_voids = []
+
+    def handle_starttag(self, tag, attrs):
+        """Open a tag, closing it straight away if it is a void element."""
+        self._end_data()
+        self._open_tag(tag, attrs)
+        if tag in _VOID_ELEMENTS:
+            self._close_tag(tag)
+            self._closed_voids.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        """Open and close a tag."""
+        self._end_data()
+        self._open_tag(tag, attrs)
+        self._close_tag(tag)
+
+    def handle_endtag(self, tag):
+        """Close the tag and any still open inside it."""
+        if tag in self._closed_voids:
+            self._closed_voids.remove(tag)
+        else:
+            self._close_tag(tag)
+
+    def handle_data(self, data):
+        """Gather text, which is one string until the next markup."""
+        self._data.append(data)
+
+    def handle_comment(self, data):
+        """Keep comments in the HTML only."""
+        self._end_data()
+        self._data.append(data)
+        self._end_data("comment")
+
+    def handle_decl(self, decl):
+        """Keep the doctype in the HTML only."""
+        self._end_data()
+        self._data.append(decl[len("DOCTYPE ") :])
+        self._end_data("doctype")
+
+    def handle_pi(self, data):
+        """Keep processing instructions in the HTML only."""
+        self._end_data()
+        self._data.append(data)
+        self._end_data("pi")
+
+    def unknown_decl(self, data):
+        """CDATA sections are text, other declarations are kept in the HTML only."""
+        self._end_data()
+        if data.upper().startswith("CDATA["):
+            self._data.append(data[len("CDATA[") :])
+            self._end_data("cdata")
+        else:
+            self._data.append(data)
+            self._end_data("declaration")
+
+    def close(self):
+        """Finish parsing, closing any tags left open."""
+        super().close()
+        self._end_data()
+        while self._open_tags:
+            self._pop_tag()
+
+    def _open_tag(self, tag, attrs):
+        if tag == "body" and not self.found_body:
+            self.found_body = True
+            self._body_index = len(self._open_tags)
+        self._count_tag(tag, 1)
+        shown = self._body_index is not None and not self._unsafe
+        if shown:
+            self.html.append(_start_tag(tag, attrs))
+        self._open_tags.append((tag, shown))
+
+    def _close_tag(self, tag):
+        self._end_data()
+        if not any(open_tag == tag for open_tag, _ in self._open_tags):
+            return
+        while self._pop_tag() != tag:
+            pass
+
+    def _pop_tag(self):
+        tag, shown = self._open_tags.pop()
+        if shown and tag not in _VOID_ELEMENTS:
+            self.html.append(f"</{tag}>")
+        self._count_tag(tag, -1)
+        if self._body_index is not None and len(self._open_tags) <= self._body_index:
+            self._body_index = None
+        return tag
+
+    def _count_tag(self, tag, change):
+        if tag in _HIDDEN_TEXT_ELEMENTS:
+            self._hidden += change
+            if tag in _UNSAFE_ELEMENTS:
+                self._unsafe += change
+        elif tag in _PRESERVE_WHITESPACE_ELEMENTS:
+            self._preserve_whitespace += change
+
+    def _end_data(self, kind=None):
+        if not self._data:
+            return
+        data = "".join(self._data)
+        self._data = []
+        if self._body_index is None:
+            return
+        # BeautifulSoup reduces whitespace only strings to one character
+        if not self._preserve_whitespace and not data.translate(_ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        if kind is None:
+            if not self._hidden:
+                self.text.append(data)
+            if not self._unsafe:
+                self.html.append(_escape(data))
+            return
+        if kind == "cdata":
+            self.text.append(data)
+        if not self._unsafe:
+            prefix, suffix = _STRING_MARKUP[kind]
+            self.html.append(f"{prefix}{data}{suffix}")
+
+
+def _start_tag(tag, attrs):
+    """Write out a start tag as BeautifulSoup does."""
+    values = {}
+    list_attributes = _TAG_LIST_ATTRIBUTES.get(tag, frozenset())
+    for name, value in attrs:
+        value = value or ""
+        if name in _LIST_ATTRIBUTES or name in list_attributes:
+            value = " ".join(value.split())
+        values[name] = value
+    if tag == "meta":
+        # The declared encoding becomes the encoding written out
+        if "charset" in values:
+            values["charset"] = "utf-8"
+        elif "content" in values and (
+            (values.get("http-equiv") or "").lower() == "content-type"
+        ):
+            values["content"] = _CHARSET.sub(
+                lambda match: f"{match.group(1)}utf-8", values["content"]
+            )
+    attributes = "".join(
+        f" {name}={_quote(_escape(value))}" for name, value in sorted(values.items())
+    )
+    closing_slash = "/" if tag in _VOID_ELEMENTS else ""
+    return f"<{tag}{attributes}{closing_slash}>"
+
+
+def _escape(value):
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _quote(value):
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return '"{}"'.format(value.replace('"', "&quot;"))
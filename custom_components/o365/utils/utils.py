@@ -2,12 +2,16 @@
 
 import logging
 
-from bs4 import BeautifulSoup
-
 from ..const import (
+    BODY_MODE_HTML,
+    BODY_MODE_PREVIEW,
+    BODY_MODE_TEXT,
     CONF_ACCOUNT,
     CONF_ACCOUNT_NAME,
+    CONF_ADAPTIVE_POLLING,
+    CONF_ATTACHMENT_STORE_SIZE,
     CONF_AUTO_REPLY_SENSORS,
+    CONF_BATCH_REQUESTS,
     CONF_CHAT_SENSORS,
     CONF_CLIENT_ID,
     CONF_CONFIG_TYPE,
@@ -15,49 +19,37 @@ from ..const import (
     CONF_ENABLE_CALENDAR,
     CONF_ENABLE_UPDATE,
     CONF_IS_AUTHENTICATED,
+    CONF_MAX_CONCURRENT_UPDATES,
     CONF_PERMISSIONS,
+    CONF_PUSH_NOTIFICATIONS,
     CONF_QUERY_SENSORS,
+    CONF_RATE_LIMIT,
     CONF_STATUS_SENSORS,
     CONF_TODO_SENSORS,
     CONF_TRACK_NEW_CALENDAR,
+    CONF_UPDATE_TIMEOUT,
     DATETIME_FORMAT,
+    DEFAULT_ATTACHMENT_STORE_SIZE,
+    DEFAULT_MAX_CONCURRENT_UPDATES,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_UPDATE_TIMEOUT,
 )
+from .body import parse_body
 
 _LOGGER = logging.getLogger(__name__)
 
 
 def clean_html(html):
     """Clean the HTML."""
-    soup = BeautifulSoup(html, features="html.parser")
-    if body := soup.find("body"):
-        # get text
-        text = body.get_text()
-
-        # break into lines and remove leading and trailing space on each
-        lines = (line.strip() for line in text.splitlines())
-        # break multi-headlines into a line each
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        # drop blank lines
-        text = "\n".join(chunk for chunk in chunks if chunk)
-        return text.replace("\xa0", " ")
-
-    return html
+    return parse_body(html).text
 
 
 def _safe_html(html):
     """Make the HTML safe."""
-    soup = BeautifulSoup(html, features="html.parser")
-    if soup.find("body"):
-        blacklist = ["script", "style"]
-        for tag in soup.findAll():
-            if tag.name.lower() in blacklist:
-                # blacklisted tags are removed in their entirety
-                tag.extract()
-        return str(soup.find("body"))
-    return html
+    return parse_body(html).safe_html
 
 
-def get_email_attributes(mail, download_attachments, html_body, show_body):
+def get_email_attributes(mail, download_attachments, body_mode):
     """Get the email attributes."""
     data = {
         "subject": mail.subject,
@@ -74,10 +66,15 @@ def get_email_attributes(mail, download_attachments, html_body, show_body):
             "due_date": mail.flag.due_date,
             "completion_date": mail.flag.completition_date,
         },
+        "uid": mail.object_id,
     }
 
-    if show_body or html_body:
-        data["body"] = _safe_html(mail.body) if html_body else clean_html(mail.body)
+    if body_mode == BODY_MODE_PREVIEW:
+        data["body"] = mail.body_preview
+    elif body_mode == BODY_MODE_TEXT:
+        data["body"] = clean_html(mail.body)
+    elif body_mode == BODY_MODE_HTML:
+        data["body"] = _safe_html(mail.body)
     if download_attachments:
         data["attachments"] = [x.name for x in mail.attachments]
 
@@ -111,4 +108,15 @@ def build_account_config(config, account, is_authenticated, conf_type, perms):
         CONF_ACCOUNT_NAME: config.get(CONF_ACCOUNT_NAME, ""),
         CONF_CONFIG_TYPE: conf_type,
         CONF_PERMISSIONS: perms,
+        CONF_MAX_CONCURRENT_UPDATES: config.get(
+            CONF_MAX_CONCURRENT_UPDATES, DEFAULT_MAX_CONCURRENT_UPDATES
+        ),
+        CONF_UPDATE_TIMEOUT: config.get(CONF_UPDATE_TIMEOUT, DEFAULT_UPDATE_TIMEOUT),
+        CONF_RATE_LIMIT: config.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+        CONF_BATCH_REQUESTS: config.get(CONF_BATCH_REQUESTS, False),
+        CONF_PUSH_NOTIFICATIONS: config.get(CONF_PUSH_NOTIFICATIONS, False),
+        CONF_ADAPTIVE_POLLING: config.get(CONF_ADAPTIVE_POLLING, True),
+        CONF_ATTACHMENT_STORE_SIZE: config.get(
+            CONF_ATTACHMENT_STORE_SIZE, DEFAULT_ATTACHMENT_STORE_SIZE
+        ),
     }
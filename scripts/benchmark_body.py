@@ -0,0 +1,102 @@
+"""Benchmark email body parsing against the BeautifulSoup version it replaced.
+
+The BeautifulSoup functions below are clean_html and _safe_html as they were
+before utils/body.py. Each sample body is checked to give the same text and
+safe HTML both ways before it is timed. BeautifulSoup is no longer a
+requirement of the integration, so install it to run this:
+
+    pip install beautifulsoup4
+    python scripts/benchmark_body.py
+"""
+
+import importlib
+import importlib.util
+import sys
+import timeit
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+PACKAGE_PATH = Path(__file__).resolve().parent.parent / "custom_components" / "o365"
+
+ROW = (
+    "<tr><td style='padding:4px'><a href='https://example.com/x?id=1'>"
+    "Item &amp; link</a></td><td><span>Some&nbsp;text here</span><br>more text"
+    "</td></tr>\n"
+)
+SAMPLES = {
+    "newsletter": (
+        "<html><head><style>td{color:red}</style><meta charset='utf-8'></head>"
+        f"<body><div><table>{ROW * 400}</table><p>Footer &copy; 2024</p></div>"
+        "</body></html>"
+    ),
+    "short html": "<html><body><p>Hi,</p><p>See you at 10.</p></body></html>",
+    "plain text": "Meeting notes: nothing to add. " * 20,
+}
+
+
+def bs4_clean_html(html):
+    """Text of the body, as clean_html was."""
+    soup = BeautifulSoup(html, features="html.parser")
+    if body := soup.find("body"):
+        text = body.get_text()
+        lines = (line.strip() for line in text.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        text = "\n".join(chunk for chunk in chunks if chunk)
+        return text.replace("\xa0", " ")
+    return html
+
+
+def bs4_safe_html(html):
+    """The body without scripts and styles, as _safe_html was."""
+    soup = BeautifulSoup(html, features="html.parser")
+    if soup.find("body"):
+        for tag in soup.find_all():
+            if tag.name.lower() in ["script", "style"]:
+                tag.extract()
+        return str(soup.find("body"))
+    return html
+
+
+def load_body_module():
+    """Import utils/body.py without the integration's __init__, which needs HA."""
+    spec = importlib.util.spec_from_loader("o365", loader=None, is_package=True)
+    package = importlib.util.module_from_spec(spec)
+    package.__path__ = [str(PACKAGE_PATH)]
+    sys.modules["o365"] = package
+    return importlib.import_module("o365.utils.body")
+
+
+def time_ms(func, number):
+    """Best time of a call, in milliseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def main():
+    """Time each sample body with BeautifulSoup, a fresh parse and a cache hit."""
+    body = load_body_module()
+
+    def parse(html):
+        parsed = body.parse_body(html)
+        return parsed.text, parsed.safe_html
+
+    def parse_uncached(html):
+        body._cache.clear()  # pylint: disable=protected-access
+        return parse(html)
+
+    print(f"{'sample':24} {'bs4':>10} {'parse':>10} {'cache hit':>10}")
+    for name, html in SAMPLES.items():
+        if parse_uncached(html) != (bs4_clean_html(html), bs4_safe_html(html)):
+            sys.exit(f"Output differs from BeautifulSoup for: {name}")
+        number = 20 if len(html) > 10000 else 2000
+        old = time_ms(
+            lambda html=html: (bs4_clean_html(html), bs4_safe_html(html)), number
+        )
+        new = time_ms(lambda html=html: parse_uncached(html), number)
+        cached = time_ms(lambda html=html: parse(html), number * 10)
+        label = f"{name} ({len(html) // 1024} kB)"
+        print(f"{label:24} {old:8.3f}ms {new:8.3f}ms {cached:8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Send MS Graph style change notifications to the O365 push webhook.
+
+Stands in for MS Graph when trying out push notifications locally, without
+an external https URL. It posts a subscription validation request, then a
+change notification and each lifecycle event, to the webhook of an account:
+
+    python scripts/push_notifier.py http://localhost:8123/api/o365/notify/<account>
+
+By default it checks that the webhook answers the validation request, and
+accepts and then ignores notifications it cannot trust. Notifications are only
+acted on when they carry the subscription id and client state of a live
+subscription, so without them each is ignored with a warning in the Home
+Assistant log, as a forged notification would be.
+
+To see the sensors refresh, pass both in:
+
+    python scripts/push_notifier.py <url> --subscription-id <id> --client-state <state>
+
+The subscription id is logged at debug level by
+custom_components.o365.helpers.push when a subscription is made. The client
+state is a secret, so is never logged. On a development instance, read it from
+the account's push manager, for example in a debugger:
+
+    hass.data["o365"]["<account>"]["push_manager"]._client_state
+"""
+
+import argparse
+import json
+import secrets
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+LIFECYCLE_EVENTS = ("missed", "subscriptionRemoved", "reauthorizationRequired")
+
+
+def post(url, body=None):
+    """POST to the webhook, returning the status and response text."""
+    data = json.dumps(body).encode() if body is not None else b""
+    request = urllib.request.Request(
+        url, data=data, headers={"Content-Type": "application/json"}, method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as err:
+        return err.code, err.read().decode()
+
+
+def validate(url):
+    """Subscribing makes MS Graph check that the webhook echoes a token."""
+    token = secrets.token_urlsafe(16)
+    status, text = post(f"{url}?{urllib.parse.urlencode({'validationToken': token})}")
+    return status == 200 and text == token, status
+
+
+def notify(url, notification):
+    """MS Graph sends notifications in a value list and expects a 202."""
+    status, _ = post(url, {"value": [notification]})
+    return status == 202, status
+
+
+def main():
+    """Run each notification against the webhook and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("url", help="Webhook URL, /api/o365/notify/<account name>")
+    parser.add_argument("--subscription-id", default="stand-in-subscription")
+    parser.add_argument("--client-state", default="stand-in-client-state")
+    parser.add_argument("--resource", default="me/mailFolders/inbox/messages")
+    args = parser.parse_args()
+
+    notification = {
+        "subscriptionId": args.subscription_id,
+        "clientState": args.client_state,
+        "resource": args.resource,
+    }
+    checks = [("validation", validate(args.url))]
+    checks.append(
+        ("change", notify(args.url, notification | {"changeType": "created"}))
+    )
+    checks.extend(
+        (event, notify(args.url, notification | {"lifecycleEvent": event}))
+        for event in LIFECYCLE_EVENTS
+    )
+    status, _ = post(args.url)
+    checks.append(("invalid body", (status == 400, status)))
+
+    failed = False
+    for name, (passed, status) in checks:
+        failed = failed or not passed
+        print(f"{name:<24} {'ok' if passed else 'FAILED'} {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())